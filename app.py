@@ -4,10 +4,24 @@ from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
+import copy
 import csv
+import heapq
 import io
+import json
+import math
+import os
+import sqlite3
+import tempfile
 import threading
-from contextlib import contextmanager
+import time
+import multiprocessing
+import operator
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from contextlib import closing, contextmanager
+from functools import lru_cache
+import numpy as np
 
 app = Flask(__name__)
 
@@ -35,6 +49,15 @@ NAKSHATRA_LORDS = [
     "Jupiter", "Saturn", "Mercury"
 ]
 
+# (name, lord) per nakshatra index
+NAK_TABLE = tuple(zip(NAKSHATRAS, NAKSHATRA_LORDS))
+
+# lord -> ascending nakshatra indices it rules (three each)
+NAK_INDICES_BY_LORD = {
+    lord: tuple(i for i, nak_lord in enumerate(NAKSHATRA_LORDS) if nak_lord == lord)
+    for lord in set(NAKSHATRA_LORDS)
+}
+
 HOUSE_LORDS = [
     "Mars", "Venus", "Mercury", "Moon", "Sun", "Mercury",
     "Venus", "Mars", "Jupiter", "Saturn", "Saturn", "Jupiter"
@@ -56,9 +79,37 @@ PLANET_MAP = {
 # Filter out None-valued planets (in case some constants missing)
 PLANET_MAP = {k: v for k, v in PLANET_MAP.items() if v is not None}
 
+# Virtual body id for Ketu (mean node + 180°), accepted by the longitude helpers
+KETU = -1000
+
+# Bodies sampled up front (as rows of one shared block) for worker-process scans
+GRID_BODIES = tuple(PLANET_MAP.values())
+GRID_BODY_NAMES = tuple(PLANET_MAP)
+
+# Native sampling step of every body but the Moon: the scan grid samples it at
+# this spacing and interpolates in between. Edges are still refined exactly.
+NATIVE_STEP_SECONDS = {
+    swe.SUN: 6 * 3600,
+    swe.MERCURY: 6 * 3600,
+    swe.VENUS: 6 * 3600,
+    swe.MARS: 86400,
+    swe.JUPITER: 86400,
+    swe.SATURN: 3 * 86400,
+    swe.MEAN_NODE: 86400,
+}
+if "Uranus" in PLANET_MAP:
+    NATIVE_STEP_SECONDS[PLANET_MAP["Uranus"]] = 7 * 86400
+if "Neptune" in PLANET_MAP:
+    NATIVE_STEP_SECONDS[PLANET_MAP["Neptune"]] = 7 * 86400
+
 PANAPHARA_WINDOWS = [(2.5, 5.0), (10.0, 12.5), (17.5, 20.0), (25.0, 27.5)]
 APOKLIMA_WINDOWS = [(5.0, 7.5), (12.5, 15.0), (20.0, 22.5), (27.5, 30.0)]
 
+# Reciprocals of the sign (30°), nakshatra (13°20') and navamsa (3°20') spans
+_SIGN_RECIP = 1.0 / 30.0
+_NAK_RECIP = 27.0 / 360.0
+_NAV_RECIP = 9.0 / 30.0
+
 POPULAR_CITIES = [
     "New York, USA", "London, UK", "Tokyo, Japan", "Mumbai, India",
     "Delhi, India", "Bangalore, India", "Chennai, India", "Kolkata, India",
@@ -72,6 +123,26 @@ POPULAR_CITIES = [
 # Because swisseph sidereal mode is global, serialize access with a lock.
 swe_lock = threading.Lock()
 
+# Directory with Swiss Ephemeris .se1 files; None keeps the built-in Moshier fallback
+EPHE_PATH = os.environ.get("SE_EPHE_PATH")
+
+# calc_ut flags for transit longitudes: positions only, the scans never read speeds
+CALC_FLAGS = swe.FLG_SWIEPH
+
+def init_swisseph():
+    """(Re)open swisseph state for this process. Call once per worker after fork
+    so workers do not share the parent's ephemeris file handles."""
+    global _current_sid_mode
+    with swe_lock:
+        swe.close()
+        swe.set_ephe_path(EPHE_PATH)
+        _current_sid_mode = None
+
+# SIDM mode currently set in swisseph, and the friendly name that set it
+# (guarded by swe_lock)
+_current_sid_mode = None
+_current_ayanamsa_name = None
+
 # Candidate SIDM constant names per user-friendly ayanamsa name.
 AYANAMSA_CANDIDATES = {
     "KP_old": [
@@ -90,6 +161,20 @@ AYANAMSA_CANDIDATES = {
     ]
 }
 
+def _resolve_ayanamsa_candidates():
+    """Map each friendly name to the first (constant_name, mode) this build has"""
+    resolved = {}
+    for name, candidates in AYANAMSA_CANDIDATES.items():
+        for cand in candidates:
+            if hasattr(swe, cand):
+                resolved[name] = (cand, getattr(swe, cand))
+                break
+    return resolved
+
+_AYANAMSA_RESOLVED = _resolve_ayanamsa_candidates()
+
+init_swisseph()
+
 def set_ayanamsa_by_name(name):
     """
     Try to set swisseph sidereal mode according to a friendly name.
@@ -102,19 +187,23 @@ def set_ayanamsa_by_name(name):
     if name not in AYANAMSA_CANDIDATES:
         return False, f"Unknown ayanamsa: {name}"
 
-    candidates = AYANAMSA_CANDIDATES[name]
-    for cand in candidates:
-        if hasattr(swe, cand):
-            mode = getattr(swe, cand)
-            try:
-                swe.set_sid_mode(mode)
-                return True, cand
-            except Exception as ex:
-                # try next candidate
-                continue
+    resolved = _AYANAMSA_RESOLVED.get(name)
+    if resolved is None:
+        return False, f"No swisseph SIDM constant available for '{name}' on this system"
 
-    # If none of the named constants exist, return failure
-    return False, f"No swisseph SIDM constant available for '{name}' on this system"
+    global _current_sid_mode, _current_ayanamsa_name
+    cand, mode = resolved
+    try:
+        swe.set_sid_mode(mode)
+    except Exception as ex:
+        return False, f"Could not set {cand} for '{name}': {ex}"
+    if mode != _current_sid_mode:
+        # Memoized ayanamsa values belong to the previous mode
+        _ayan_cached.cache_clear()
+        _body_lon_sid_cached.cache_clear()
+        _current_sid_mode = mode
+    _current_ayanamsa_name = name
+    return True, cand
 
 @contextmanager
 def use_ayanamsa(name):
@@ -131,50 +220,248 @@ def use_ayanamsa(name):
 # ============================================================================
 
 def wrap360(deg):
-    """Wrap angle to [0, 360)"""
+    """Wrap angle (scalar or ndarray) to [0, 360)"""
     return deg % 360.0
 
+def wrap360_near(lons):
+    """wrap360 for an ndarray already within one turn of [0, 360): a compare and
+    shift instead of np.mod's fmod"""
+    lons = lons + np.where(lons < 0.0, 360.0, 0.0)
+    lons -= np.where(lons >= 360.0, 360.0, 0.0)
+    return lons
+
+@lru_cache(maxsize=8192)
+def _julday_cached(year, month, day, hour_frac):
+    return swe.julday(year, month, day, hour_frac)
+
+@lru_cache(maxsize=8192)
+def _ayan_cached(jd):
+    # Only valid for the current SIDM mode; cleared by set_ayanamsa_by_name
+    return swe.get_ayanamsa_ut(jd)
+
+# Daily (jd_grid, ayan_grid) table for the scan in progress (guarded by swe_lock)
+_ayan_table = None
+
+@contextmanager
+def ayanamsa_table(start_utc, end_utc):
+    """Precompute ayanamsa at daily resolution over [start_utc, end_utc] and
+    interpolate from it inside the block. Call with swe_lock held."""
+    global _ayan_table
+    jd_start = julian_day(start_utc)
+    jd_end = julian_day(end_utc)
+    jd_grid = np.arange(jd_start, jd_end + 1.0, 1.0)
+    ayan_grid = np.array([swe.get_ayanamsa_ut(jd) for jd in jd_grid])
+    _ayan_table = (jd_grid, ayan_grid)
+    # Bound the longitude memo to this scan
+    _body_lon_sid_cached.cache_clear()
+    try:
+        yield
+    finally:
+        _ayan_table = None
+
+def ayanamsa_interp(jd):
+    """Ayanamsa at jd (scalar or 1-D array). Linearly interpolated from the
+    active daily table when jd lies inside it (error well below 1 mas),
+    otherwise looked up directly."""
+    jd_arr = np.asarray(jd, dtype=np.float64)
+    if _ayan_table is not None and jd_arr.size:
+        jd_grid, ayan_grid = _ayan_table
+        if jd_grid[0] <= jd_arr.min() and jd_arr.max() <= jd_grid[-1]:
+            return np.interp(jd_arr, jd_grid, ayan_grid)
+    if jd_arr.ndim:
+        return np.array([_ayan_cached(float(j)) for j in jd_arr])
+    return _ayan_cached(float(jd))
+
+def julian_day(dt_utc):
+    """Julian Day (UT) for a UTC datetime"""
+    return _julday_cached(dt_utc.year, dt_utc.month, dt_utc.day,
+                          dt_utc.hour + dt_utc.minute/60.0 + dt_utc.second/3600.0)
+
+@lru_cache(maxsize=1 << 16)
+def _body_lon_sid_cached(body_id, jd):
+    # Depends on the SIDM mode; cleared with _ayan_cached and per scan
+    if body_id == KETU:
+        return (_body_lon_sid_cached(swe.MEAN_NODE, jd) + 180.0) % 360.0
+    result = swe.calc_ut(jd, body_id, CALC_FLAGS)
+    lon_trop = result[0][0]
+    ayan = float(ayanamsa_interp(jd))
+    return (lon_trop - ayan) % 360.0
+
 def body_lon_sid(dt_utc, body_id):
     """Get sidereal longitude of a body at given UTC datetime"""
-    jd = swe.julday(dt_utc.year, dt_utc.month, dt_utc.day,
-                    dt_utc.hour + dt_utc.minute/60.0 + dt_utc.second/3600.0)
-    result = swe.calc_ut(jd, body_id)
-    lon_trop = result[0][0]
-    ayan = swe.get_ayanamsa_ut(jd)
-    lon_sid = wrap360(lon_trop - ayan)
-    return lon_sid
+    return _body_lon_sid_cached(body_id, julian_day(dt_utc))
+
+def _calc_lon_sid_array(jd_array, body_id):
+    if body_id == KETU:
+        return wrap360_near(_calc_lon_sid_array(jd_array, swe.MEAN_NODE) + 180.0)
+    ayan = ayanamsa_interp(jd_array)
+    calc_ut = swe.calc_ut
+    # Iterate Python floats; the subtraction and wrap stay vectorized
+    lons = np.fromiter((calc_ut(jd, body_id, CALC_FLAGS)[0][0] for jd in jd_array.tolist()),
+                       dtype=np.float64, count=len(jd_array))
+    return wrap360_near(lons - ayan)
+
+def body_lon_sid_array(jd_array, body_id):
+    """Get sidereal longitudes of a body for an array of Julian Days (UT).
+    The active scan grid itself is served from its per-body cache."""
+    if _lon_grid is not None and jd_array is _lon_grid.jd:
+        return _lon_grid.lons(body_id)
+    jd_array = np.atleast_1d(np.asarray(jd_array, dtype=np.float64))
+    return _calc_lon_sid_array(jd_array, body_id)
+
+def body_sign_and_deg_array(jd_array, body_id):
+    """(sign_idx, deg) arrays of a body for an array of Julian Days (UT)"""
+    if _lon_grid is not None and jd_array is _lon_grid.jd:
+        return _lon_grid.sign_and_deg(body_id)
+    return sign_and_deg_vec(body_lon_sid_array(jd_array, body_id))
+
+def body_nak_idx_array(jd_array, body_id):
+    """Nakshatra index (0-26) array of a body for an array of Julian Days (UT)"""
+    if _lon_grid is not None and jd_array is _lon_grid.jd:
+        return _lon_grid.nak_idx(body_id)
+    return nak_idx_vec(body_lon_sid_array(jd_array, body_id))
+
+class LongitudeGrid:
+    """Sidereal longitudes sampled once per body on the shared coarse scan grid"""
+
+    def __init__(self, start_utc, end_utc, step_seconds):
+        self.jd_start = julian_day(start_utc)
+        self.step_seconds = step_seconds
+        n_steps = int((end_utc - start_utc).total_seconds() // step_seconds) + 1
+        offsets = np.arange(n_steps, dtype=np.int64) * step_seconds
+        self.jd = self.jd_start + offsets / 86400.0
+        self.jd.flags.writeable = False
+        self._lons = {}
+        self._sign_deg = {}
+        self._nak_idx = {}
+        # Bodies whose lons() are interpolated between native samples
+        self.interpolated = set()
+
+    def attach(self, buf, bodies):
+        """Serve bodies from buf, a (len(bodies), len(jd)) float64 block already
+        filled by _sample_body_in_worker; any other body is still sampled lazily"""
+        table = np.ndarray((len(bodies), len(self.jd)), dtype=np.float64, buffer=buf)
+        table.flags.writeable = False
+        for row, body_id in enumerate(bodies):
+            self._lons[body_id] = table[row]
+            if self._stride(body_id) > 1:
+                self.interpolated.add(body_id)
+
+    def matches(self, jd_start, step_seconds, n_steps):
+        return (jd_start == self.jd_start and step_seconds == self.step_seconds
+                and n_steps == len(self.jd))
+
+    def lons(self, body_id):
+        """Longitudes of body_id over self.jd, computed on first use (read-only)"""
+        lons = self._lons.get(body_id)
+        if lons is None:
+            stride = self._stride(body_id)
+            if body_id == KETU:
+                lons = wrap360_near(self.lons(swe.MEAN_NODE) + 180.0)
+            elif stride > 1:
+                lons = self._interpolated_lons(body_id, stride)
+                self.interpolated.add(body_id)
+            else:
+                lons = _calc_lon_sid_array(self.jd, body_id)
+            lons.flags.writeable = False
+            self._lons[body_id] = lons
+        return lons
+
+    def _stride(self, body_id):
+        """Grid points per native sample of body_id (1 = sample every point)"""
+        stride = NATIVE_STEP_SECONDS.get(body_id, 0) // self.step_seconds
+        return stride if stride > 1 and len(self.jd) > 2 * stride else 1
+
+    def _interpolated_lons(self, body_id, stride):
+        """Sample body_id on every stride-th grid point (and the last) and
+        interpolate the unwrapped longitude onto the rest of the grid"""
+        idx = np.arange(0, len(self.jd), stride)
+        if idx[-1] != len(self.jd) - 1:
+            idx = np.append(idx, len(self.jd) - 1)
+        knots = np.unwrap(_calc_lon_sid_array(self.jd[idx], body_id), period=360.0)
+        return wrap360(np.interp(self.jd, self.jd[idx], knots))
+
+    def sign_and_deg(self, body_id):
+        """(sign_idx, deg) split of lons(body_id), computed once (read-only)"""
+        split = self._sign_deg.get(body_id)
+        if split is None:
+            split = sign_and_deg_vec(self.lons(body_id))
+            for arr in split:
+                arr.flags.writeable = False
+            self._sign_deg[body_id] = split
+        return split
+
+    def nak_idx(self, body_id):
+        """Nakshatra index array of lons(body_id), computed once (read-only)"""
+        idx = self._nak_idx.get(body_id)
+        if idx is None:
+            idx = nak_idx_vec(self.lons(body_id))
+            idx.flags.writeable = False
+            self._nak_idx[body_id] = idx
+        return idx
+
+# Coarse grid shared by every rule of the scan in progress (guarded by swe_lock)
+_lon_grid = None
+
+@contextmanager
+def longitude_grid(start_utc, end_utc, step_seconds, shared_buf=None, bodies=GRID_BODIES):
+    """Share one LongitudeGrid across all find_true_intervals calls in the block,
+    optionally backed by a shared-memory block pre-sampled for bodies"""
+    global _lon_grid
+    _lon_grid = LongitudeGrid(start_utc, end_utc, step_seconds)
+    if shared_buf is not None:
+        _lon_grid.attach(shared_buf, bodies)
+    try:
+        yield _lon_grid
+    finally:
+        _lon_grid = None
 
 def sign_and_deg(lon_sid):
     """Convert sidereal longitude to (sign_index, degree_in_sign)"""
-    lon_sid = wrap360(lon_sid)
-    sign_idx = int(lon_sid / 30.0)
+    lon_sid = lon_sid % 360.0
+    sign_idx = math.floor(lon_sid * _SIGN_RECIP)
     deg = lon_sid - (sign_idx * 30.0)
     return sign_idx, deg
 
+def sign_and_deg_vec(lons):
+    """Vectorized sign_and_deg for an ndarray of sidereal longitudes in [0, 360)"""
+    lons = np.asarray(lons)
+    # Reciprocal multiply instead of float floor division (~15x faster), then
+    # move the few longitudes that rounding put across a cusp back
+    sign = np.floor(lons * _SIGN_RECIP)
+    deg = lons - sign * 30.0
+    off = np.flatnonzero((deg < 0.0) | (deg >= 30.0))
+    if len(off):
+        sign[off] += np.where(deg[off] < 0.0, -1.0, 1.0)
+        deg[off] = lons[off] - sign[off] * 30.0
+    return sign.astype(np.int8), deg
+
+def nak_idx_vec(lons):
+    """Nakshatra index (int8) for an ndarray of sidereal longitudes in [0, 360)"""
+    return (np.asarray(lons) * _NAK_RECIP).astype(np.int8)
+
 def calculate_ascendant(dt_utc, lat, lon):
     """Calculate sidereal ascendant"""
-    jd = swe.julday(dt_utc.year, dt_utc.month, dt_utc.day,
-                    dt_utc.hour + dt_utc.minute/60.0 + dt_utc.second/3600.0)
+    jd = julian_day(dt_utc)
     cusps, ascmc = swe.houses(jd, lat, lon, b'P')
     asc_trop = ascmc[0]
-    ayan = swe.get_ayanamsa_ut(jd)
-    asc_sid = wrap360(asc_trop - ayan)
+    ayan = float(ayanamsa_interp(jd))
+    asc_sid = (asc_trop - ayan) % 360.0
     return asc_sid
 
 def get_nakshatra_from_longitude(lon_sid):
     """Get nakshatra index, name, and lord from sidereal longitude"""
-    lon_sid = wrap360(lon_sid)
-    nak_idx = int(lon_sid / (360.0 / 27.0))
-    nak_name = NAKSHATRAS[nak_idx]
-    nak_lord = NAKSHATRA_LORDS[nak_idx]
+    lon_sid = lon_sid % 360.0
+    nak_idx = math.floor(lon_sid * _NAK_RECIP)
+    nak_name, nak_lord = NAK_TABLE[nak_idx]
     return nak_idx, nak_name, nak_lord
 
 def calculate_navamsa_sign(lon_sid):
     """Calculate D9 (Navamsa) sign index from sidereal longitude"""
-    lon_sid = wrap360(lon_sid)
-    sign_idx = int(lon_sid / 30.0)
+    lon_sid = lon_sid % 360.0
+    sign_idx = math.floor(lon_sid * _SIGN_RECIP)
     deg_in_sign = lon_sid - (sign_idx * 30.0)
-    navamsa_pada = int(deg_in_sign / 3.333333333)
+    navamsa_pada = math.floor(deg_in_sign * _NAV_RECIP)
     
     if sign_idx % 4 == 0:  # Movable
         d9_sign = (navamsa_pada) % 12
@@ -187,25 +474,49 @@ def calculate_navamsa_sign(lon_sid):
     
     return d9_sign
 
+# All window edges are multiples of 2.5°, so membership is a lookup on the
+# 2.5° bucket. Index 12 (deg == 30) stays False; it is reached via ceil - 1.
+WINDOW_BUCKET = 2.5
+
+def _window_lut(windows):
+    lut = np.zeros(13, dtype=bool)
+    for a, b in windows:
+        lut[int(round(a / WINDOW_BUCKET)):int(round(b / WINDOW_BUCKET))] = True
+    return lut
+
+PANAPHARA_LUT = _window_lut(PANAPHARA_WINDOWS)
+APOKLIMA_LUT = _window_lut(APOKLIMA_WINDOWS)
+
+def _in_window_lut(lut, deg):
+    # Windows are closed: an exact edge belongs to the bucket on either side
+    x = np.asarray(deg) / WINDOW_BUCKET
+    return lut[np.floor(x).astype(np.intp)] | lut[np.ceil(x).astype(np.intp) - 1]
+
+def sign_window_mask(sidx, deg, sign_idx, a, b):
+    """Mask where (sidx, deg) arrays are in sign sign_idx between a and b degrees (inclusive)"""
+    return (sidx == sign_idx) & (a <= deg) & (deg <= b)
+
+# D9 sign offset by sign modality (movable, fixed, dual, movable)
+NAVAMSA_OFFSETS = np.array([0, 9, 6, 3], dtype=np.int8)
+
+def calculate_navamsa_sign_vec(lons):
+    """Vectorized calculate_navamsa_sign for an ndarray of sidereal longitudes"""
+    sign_idx, deg = sign_and_deg_vec(lons)
+    pada = (deg * _NAV_RECIP).astype(np.int8)
+    return (pada + NAVAMSA_OFFSETS[sign_idx % 4]) % 12
+
 def degree_in_panaphara_window(deg):
-    """Check if degree is in any Panaphara window"""
-    for a, b in PANAPHARA_WINDOWS:
-        if a <= deg <= b:
-            return True
-    return False
+    """Check if degree (scalar or ndarray) is in any Panaphara window"""
+    return _in_window_lut(PANAPHARA_LUT, deg)
 
 def degree_in_apoklima_window(deg):
-    """Check if degree is in any Apoklima window"""
-    for a, b in APOKLIMA_WINDOWS:
-        if a <= deg <= b:
-            return True
-    return False
+    """Check if degree (scalar or ndarray) is in any Apoklima window"""
+    return _in_window_lut(APOKLIMA_LUT, deg)
 
 def dms_short(deg):
     """Format degree as DD°MM'"""
-    d = int(deg)
-    m = int((deg - d) * 60)
-    return f"{d:02d}°{m:02d}'"
+    d, frac = divmod(deg, 1)
+    return f"{int(d):02d}°{int(frac * 60):02d}'"
 
 def window_str(a, b):
     """Format window as DD°MM' - DD°MM'"""
@@ -213,14 +524,61 @@ def window_str(a, b):
 
 def fmt_dt(dt):
     """Format datetime as YYYY-MM-DD HH:MM"""
-    return dt.strftime("%Y-%m-%d %H:%M")
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
+# Shared geocoder/timezone finder, constructed once (TimezoneFinder opens its
+# data files on init). timezonefinder seeks shared file handles, so serialize it.
+_GEOLOCATOR = Nominatim(user_agent="astro_transit_app", timeout=10)
+_TZ_FINDER = TimezoneFinder()
+_tz_finder_lock = threading.Lock()
+
+# Persistent geocode cache: normalized place name -> {latitude, longitude, timezone}.
+# SQLite locks the file, so gunicorn workers in separate processes can share it.
+GEOCODE_CACHE_PATH = os.environ.get(
+    "GEOCODE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "astro_geocache.sqlite3"))
+
+# Popular cities pre-geocoded at startup (normalized name -> same dict as above)
+_CITY_TABLE = {}
+
+def _geocache_key(place_name):
+    return (place_name or "").strip().lower()
+
+def _geocache_connect():
+    db = sqlite3.connect(GEOCODE_CACHE_PATH, timeout=10)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE IF NOT EXISTS geocode (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return db
+
+def _geocache_get(key):
+    try:
+        with closing(_geocache_connect()) as db:
+            row = db.execute("SELECT value FROM geocode WHERE key = ?", (key,)).fetchone()
+    except sqlite3.Error:
+        # The cache is best-effort; an unreadable cache falls back to a live lookup
+        return None
+    return json.loads(row[0]) if row else None
+
+def _geocache_put(key, value):
+    try:
+        with closing(_geocache_connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO geocode (key, value) VALUES (?, ?)",
+                       (key, json.dumps(value)))
+    except sqlite3.Error:
+        pass
+
+@lru_cache(maxsize=4096)
+def _timezone_at_rounded(lat, lon):
+    with _tz_finder_lock:
+        return _TZ_FINDER.timezone_at(lat=lat, lng=lon)
+
+def timezone_at(lat, lon):
+    """Timezone name at (lat, lon); cached on coordinates rounded to 0.01°"""
+    return _timezone_at_rounded(round(lat, 2), round(lon, 2))
 
 def get_location_info(place_name, manual_lat=None, manual_lon=None):
     """Get latitude, longitude, and timezone for a place.
     If manual_lat and manual_lon are provided, skip geocoding entirely."""
     
-    tf = TimezoneFinder()
-    
     # Use manual coordinates if provided
     if manual_lat is not None and manual_lon is not None:
         try:
@@ -228,7 +586,7 @@ def get_location_info(place_name, manual_lat=None, manual_lon=None):
             lon = float(manual_lon)
         except (ValueError, TypeError):
             raise ValueError("Invalid manual coordinates provided.")
-        tz_name = tf.timezone_at(lat=lat, lng=lon)
+        tz_name = timezone_at(lat, lon)
         if not tz_name:
             raise ValueError(f"Could not determine timezone for coordinates: {lat}, {lon}")
         return {
@@ -238,10 +596,14 @@ def get_location_info(place_name, manual_lat=None, manual_lon=None):
             "timezone": tz_name
         }
     
+    cache_key = _geocache_key(place_name)
+    cached = _CITY_TABLE.get(cache_key) or _geocache_get(cache_key)
+    if cached is not None:
+        return {"place": place_name, **cached}
+    
     # Otherwise use Nominatim geocoding with timeout
     try:
-        geolocator = Nominatim(user_agent="astro_transit_app", timeout=10)
-        location = geolocator.geocode(place_name)
+        location = _GEOLOCATOR.geocode(place_name)
     except Exception as e:
         raise ValueError(
             f"Geocoding service error for '{place_name}': {e}. "
@@ -254,75 +616,281 @@ def get_location_info(place_name, manual_lat=None, manual_lon=None):
             "Try a more specific name (e.g. 'Mumbai, India') or enter coordinates manually."
         )
     
-    tz_name = tf.timezone_at(lat=location.latitude, lng=location.longitude)
+    tz_name = timezone_at(location.latitude, location.longitude)
     
     if not tz_name:
         raise ValueError(f"Could not determine timezone for: {place_name}")
     
-    return {
-        "place": place_name,
+    info = {
         "latitude": location.latitude,
         "longitude": location.longitude,
         "timezone": tz_name
     }
-
-def find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-    """Find all intervals where is_true_fn returns True"""
-    intervals = []
-    current = start_utc
-    in_interval = False
-    interval_start = None
-    
-    while current <= end_utc:
-        if is_true_fn(current):
-            if not in_interval:
-                in_interval = True
-                interval_start = current
+    _geocache_put(cache_key, info)
+    return {"place": place_name, **info}
+
+def load_city_table(places=POPULAR_CITIES):
+    """Fill _CITY_TABLE from the persistent cache only, without any network lookups"""
+    for place in places:
+        key = _geocache_key(place)
+        cached = _geocache_get(key)
+        if cached is not None:
+            _CITY_TABLE[key] = cached
+
+def prewarm_geocode_cache(places=POPULAR_CITIES, attempts=3):
+    """Geocode popular cities into _CITY_TABLE and the persistent cache, one
+    request per second to respect the Nominatim usage policy. Failures back
+    off and retry; cities still failing are left to live lookups."""
+    for place in places:
+        key = _geocache_key(place)
+        cached = _geocache_get(key)
+        if cached is not None:
+            _CITY_TABLE[key] = cached
+            continue
+        for attempt in range(attempts):
+            try:
+                info = get_location_info(place)
+            except ValueError as e:
+                error = e
+                time.sleep(2.0 ** (attempt + 1))
+                continue
+            _CITY_TABLE[key] = {k: info[k] for k in ("latitude", "longitude", "timezone")}
+            break
         else:
-            if in_interval:
-                in_interval = False
-                intervals.append((interval_start, current - timedelta(seconds=step_seconds)))
-        
-        current += timedelta(seconds=step_seconds)
-    
-    if in_interval:
-        intervals.append((interval_start, end_utc))
-    
-    # Refine intervals
+            print(f"Warning: could not pre-warm geocode cache for '{place}': {error}")
+        time.sleep(1.0)
+
+_NO_RUNS = np.empty(0, dtype=np.intp)
+
+def mask_runs(mask):
+    """(start_idx, end_idx) arrays of the inclusive runs of True in a boolean mask"""
+    mask = np.asarray(mask, dtype=bool)
+    # Most (body, sign, window) masks of a scan are all False
+    if not mask.any():
+        return _NO_RUNS, _NO_RUNS
+    # Runs alternate between the flips; the True ones are every other run
+    bounds = np.concatenate(([0], np.flatnonzero(mask[1:] != mask[:-1]) + 1, [len(mask)]))
+    first = 0 if mask[0] else 1
+    return bounds[first:-1:2], bounds[first + 1::2] - 1
+
+def scan_grid(start_utc, end_utc, step_seconds):
+    """Coarse Julian Day grid for a scan; the active LongitudeGrid's own array
+    when it matches, so body longitudes on it come from the shared cache"""
+    jd_start = julian_day(start_utc)
+    n_steps = int((end_utc - start_utc).total_seconds() // step_seconds) + 1
+    if _lon_grid is not None and _lon_grid.matches(jd_start, step_seconds, n_steps):
+        return _lon_grid.jd
+    offsets = np.arange(n_steps, dtype=np.int64) * step_seconds
+    return jd_start + offsets / 86400.0
+
+def jd_offsets_to_utc(start_utc, offsets_days):
+    """Aware datetimes start_utc + offsets_days, converted as one datetime64 array"""
+    base = np.datetime64(start_utc.replace(tzinfo=None), "us")
+    offsets_us = np.rint(np.asarray(offsets_days) * 86400e6).astype("timedelta64[us]")
+    return [dt.replace(tzinfo=start_utc.tzinfo) for dt in (base + offsets_us).tolist()]
+
+def find_true_intervals(start_utc, end_utc, is_true_arr, step_seconds, refine_to_seconds,
+                        grid_mask=None):
+    """Find all intervals where is_true_arr returns True.
+
+    is_true_arr is a vectorized predicate: it takes an ndarray of Julian Days (UT)
+    and returns a boolean ndarray of the same length. The coarse scan evaluates it
+    once over the whole step_seconds grid instead of once per step. Callers that
+    already hold the mask over scan_grid() can pass it as grid_mask; is_true_arr
+    is then only used to refine the edges.
+    """
+    jd_grid = scan_grid(start_utc, end_utc, step_seconds)
+    jd_start = jd_grid[0]
+    n_steps = len(jd_grid)
+
+    if grid_mask is None:
+        grid_mask = is_true_arr(jd_grid)
+    start_idx, end_idx = mask_runs(grid_mask)
+    if not len(start_idx):
+        return []
+    if _lon_grid is not None and jd_grid is _lon_grid.jd and _lon_grid.interpolated:
+        # An interpolated body can put grid samples next to an edge on the
+        # wrong side of it; check the neighbours of every edge exactly
+        rise_k = snap_edges(jd_grid, start_idx, is_true_arr, rising=True)
+        fall_k = snap_edges(jd_grid, end_idx + 1, is_true_arr, rising=False)
+        keep = rise_k < fall_k
+        start_idx, end_idx = rise_k[keep], fall_k[keep] - 1
+        if not len(start_idx):
+            return []
+
+    # Refine every edge at once by bisecting between the bracketing coarse
+    # samples; edges at the scan bounds are not refined
+    rises = start_idx[start_idx > 0]
+    falls = end_idx[end_idx < n_steps - 1]
+    lo = np.concatenate((jd_grid[rises - 1], jd_grid[falls]))
+    hi = np.concatenate((jd_grid[rises], jd_grid[falls + 1]))
+    rising = np.arange(len(lo)) < len(rises)
+    lo, hi = bisect_transitions(lo, hi, is_true_arr, refine_to_seconds, rising)
+    edge_jd = np.concatenate((hi[:len(rises)], lo[len(rises):]))
+    edge_utc = jd_offsets_to_utc(start_utc, edge_jd - jd_start)
+    rise_utc = iter(edge_utc[:len(rises)])
+    fall_utc = iter(edge_utc[len(rises):])
+
     refined_intervals = []
-    for start, end in intervals:
-        refined_start = start
-        refined_end = end
-        
-        # Refine start
-        test_time = start - timedelta(seconds=step_seconds)
-        while test_time >= start_utc:
-            if not is_true_fn(test_time):
-                break
-            refined_start = test_time
-            test_time -= timedelta(seconds=refine_to_seconds)
-        
-        # Refine end
-        test_time = end + timedelta(seconds=step_seconds)
-        while test_time <= end_utc:
-            if not is_true_fn(test_time):
-                break
-            refined_end = test_time
-            test_time += timedelta(seconds=refine_to_seconds)
-        
+    for i, j in zip(start_idx.tolist(), end_idx.tolist()):
+        refined_start = start_utc if i == 0 else next(rise_utc)
+        refined_end = end_utc if j == n_steps - 1 else next(fall_utc)
         refined_intervals.append((refined_start, refined_end))
     
-    return refined_intervals
+    return merge_close_intervals(refined_intervals, timedelta(seconds=refine_to_seconds))
+
+def merge_close_intervals(intervals, gap):
+    """Merge sorted (start, end) intervals separated by no more than gap.
+
+    Consecutive coarse runs are bracketed by disjoint sample pairs, so their
+    refined edges never overlap, but a False dip shorter than the refinement
+    tolerance would otherwise come out as two adjacent rows.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def snap_edges(jd_grid, k, is_true_arr, rising):
+    """Walk each edge index k until the exact predicate agrees with it on both
+    sides. k is the first sample on the new side of the edge (the first True
+    sample of a rising edge, the first False one after a falling edge);
+    k == 0 and k == len(jd_grid) stand for the scan bounds. Edges only move
+    where an interpolated body misplaced a sample, so this is usually one
+    vectorized call."""
+    n = len(jd_grid)
+    k = np.array(k, dtype=np.intp)
+    todo = np.arange(len(k))
+    while len(todo):
+        kt = k[todo]
+        vals = np.asarray(is_true_arr(jd_grid[np.concatenate((np.minimum(kt, n - 1),
+                                                              np.maximum(kt - 1, 0)))]))
+        v_after, v_before = vals[:len(kt)], vals[len(kt):]
+        late = (kt < n) & (v_after != rising)
+        early = ~late & (kt > 0) & (v_before == rising)
+        k[todo] = kt + late - early
+        todo = todo[late | early]
+    return k
+
+def bisect_transitions(lo_jd, hi_jd, is_true_arr, tol_seconds, rising):
+    """Narrow each bracket [lo_jd[k], hi_jd[k]] around a change of is_true_arr.
+
+    For a rising edge (rising[k] True) is_true_arr is False at lo_jd[k] and True
+    at hi_jd[k]; for a falling edge it is the other way round. All brackets are
+    halved together, one vectorized is_true_arr call per halving, until each is
+    within tol_seconds. Returns the narrowed (lo_jd, hi_jd), so hi_jd is the
+    first True time of a rising edge and lo_jd the last True time of a falling
+    edge.
+    """
+    tol_days = tol_seconds / 86400.0
+    lo_jd = np.array(lo_jd, dtype=np.float64)
+    hi_jd = np.array(hi_jd, dtype=np.float64)
+    active = np.flatnonzero(hi_jd - lo_jd > tol_days)
+    while len(active):
+        mid = 0.5 * (lo_jd[active] + hi_jd[active])
+        to_hi = np.asarray(is_true_arr(mid)) == rising[active]
+        hi_jd[active[to_hi]] = mid[to_hi]
+        lo_jd[active[~to_hi]] = mid[~to_hi]
+        active = active[hi_jd[active] - lo_jd[active] > tol_days]
+    return lo_jd, hi_jd
 
 # ============================================================================
 # RULE COMPUTATION FUNCTIONS
 # ============================================================================
 
-def compute_rule1_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+class RuleContext:
+    """Scan inputs shared by every rule function, plus the natal constants
+    they would otherwise re-derive per emitted row"""
+
+    def __init__(self, start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+        self.start_utc = start_utc
+        self.end_utc = end_utc
+        self.tz = tz
+        self.natal_chart = natal_chart
+        self.step_seconds = step_seconds
+        self.refine_to_seconds = refine_to_seconds
+        natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
+        # 1-based natal house number of each sidereal sign index
+        self.house_of_sign = tuple(((s - natal_asc_idx) % 12) + 1 for s in range(12))
+        self._window_intervals = {}
+
+    def find_intervals(self, is_true_arr, grid_mask=None):
+        return find_true_intervals(self.start_utc, self.end_utc, is_true_arr,
+                                   self.step_seconds, self.refine_to_seconds,
+                                   grid_mask=grid_mask)
+
+    def window_intervals(self, body_id, sign_idx, a, b):
+        """Refined intervals of body_id in sign sign_idx between a and b degrees.
+        They depend only on the body, so rules asking for the same (body,
+        sign, window) share one refinement per scan."""
+        key = (body_id, sign_idx, a, b)
+        intervals = self._window_intervals.get(key)
+        if intervals is None:
+            def is_true_arr(jd):
+                sidx, deg = body_sign_and_deg_array(jd, body_id)
+                return sign_window_mask(sidx, deg, sign_idx, a, b)
+            intervals = self._window_intervals[key] = self.find_intervals(is_true_arr)
+        return intervals
+
+    def scan_grid(self):
+        return scan_grid(self.start_utc, self.end_utc, self.step_seconds)
+
+class TransitRow:
+    """One transit interval. Slots instead of a per-row dict: rows are the
+    scan's bulk allocation. Templates read either row.start_str or
+    row['start_str'] (Jinja falls back to the attribute)."""
+    __slots__ = ("category", "rule", "body", "start", "end", "start_str", "end_str",
+                 "sign", "house", "window", "description")
+
+    def __init__(self, start, end, category, rule, body, sign, house, window, description):
+        self.start = start
+        self.end = end
+        self.start_str = None
+        self.end_str = None
+        self.category = category
+        self.rule = rule
+        self.body = body
+        self.sign = sign
+        self.house = house
+        self.window = window
+        self.description = description
+
+    def __repr__(self):
+        return f"TransitRow({self.rule!r}, {self.body!r}, {self.start!r}, {self.end!r})"
+
+def transit_row(s_utc, e_utc, fields):
+    """TransitRow for one interval: UTC start/end plus the descriptive fields
+    (category, rule, body, sign, house, window, description), which callers
+    build once per (body, sign, window) rather than per interval.
+    localize_rows() converts start/end to the transit timezone."""
+    return TransitRow(s_utc, e_utc, **fields)
+
+def localize_rows(rows, tz):
+    """Localize and format every row's start/end in one pass after the scan.
+    Many rows share an edge (the scan bounds, abutting intervals), so each
+    distinct instant is converted and formatted once."""
+    local = {}
+
+    def localize(when):
+        hit = local.get(when)
+        if hit is None:
+            loc = when.astimezone(tz)
+            hit = local[when] = (loc, fmt_dt(loc))
+        return hit
+
+    for row in rows:
+        row.start, row.start_str = localize(row.start)
+        row.end, row.end_str = localize(row.end)
+    return rows
+
+def compute_rule1_rows(ctx):
     """Money Rule #1: Jupiter/Venus/2L in Panaphara houses (2/5/8/11) + Panaphara degrees"""
     rows = []
-    panaphara_house_signs = set(natal_chart["PanapharaHouseSigns"])
-    second_lord = natal_chart.get("SecondLord")
+    panaphara_house_signs = ctx.natal_chart["PanapharaHouseSignsSorted"]
+    second_lord = ctx.natal_chart.get("SecondLord")
     
     bodies_to_check = [
         ("Jupiter", swe.JUPITER),
@@ -334,39 +902,30 @@ def compute_rule1_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
     
     for body_name, body_id in bodies_to_check:
         for a, b in PANAPHARA_WINDOWS:
-            for sign_idx in sorted(panaphara_house_signs):
-                def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx, _bid=body_id):
-                    lon = body_lon_sid(dt_utc, _bid)
-                    sidx, deg = sign_and_deg(lon)
-                    return (sidx == _sidx) and (_a <= deg <= _b)
-
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                    
-                    rows.append({
-                        "category": "Money",
-                        "rule": "Rule #1",
-                        "body": body_name,
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
-                        "sign": SIGNS[sign_idx],
-                        "house": house_num,
-                        "window": window_str(a, b),
-                        "description": f"{body_name} in Panaphara house ({house_num}) + Panaphara degree → Money",
-                    })
+            for sign_idx in panaphara_house_signs:
+                intervals = ctx.window_intervals(body_id, sign_idx, a, b)
+                if not intervals:
+                    continue
+                house_num = ctx.house_of_sign[sign_idx]
+
+                fields = {
+                    "category": "Money",
+                    "rule": "Rule #1",
+                    "body": body_name,
+                    "sign": SIGNS[sign_idx],
+                    "house": house_num,
+                    "window": window_str(a, b),
+                    "description": f"{body_name} in Panaphara house ({house_num}) + Panaphara degree → Money",
+                }
+                rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule2_rows(ctx):
     """Money Rule #2: Moon in PP planet nakshatra + Panaphara degree"""
     rows = []
     
-    panaphara_planets = natal_chart.get("PanapharaPlanets", [])
+    panaphara_planets = ctx.natal_chart.get("PanapharaPlanets", [])
     if not panaphara_planets:
         return rows
     
@@ -375,51 +934,40 @@ def compute_rule2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         pp_planet_names.add(pp["name"])
     
     for planet_name in pp_planet_names:
-        nak_indices = [i for i, lord in enumerate(NAKSHATRA_LORDS) if lord == planet_name]
+        nak_indices = NAK_INDICES_BY_LORD.get(planet_name, ())
         
         for nak_idx in nak_indices:
             nak_name = NAKSHATRAS[nak_idx]
-            nak_start_lon = nak_idx * (360.0 / 27.0)
-            nak_end_lon = (nak_idx + 1) * (360.0 / 27.0)
             
             for a, b in PANAPHARA_WINDOWS:
-                def is_true_fn(dt_utc, _nak_start=nak_start_lon, _nak_end=nak_end_lon, _a=a, _b=b):
-                    moon_lon = body_lon_sid(dt_utc, swe.MOON)
-                    moon_lon = wrap360(moon_lon)
-                    in_nakshatra = (_nak_start <= moon_lon < _nak_end)
-                    _, moon_deg = sign_and_deg(moon_lon)
-                    in_panaphara_deg = (_a <= moon_deg <= _b)
-                    return in_nakshatra and in_panaphara_deg
+                def is_true_arr(jd, _nak=nak_idx, _a=a, _b=b):
+                    in_nakshatra = body_nak_idx_array(jd, swe.MOON) == _nak
+                    moon_deg = body_sign_and_deg_array(jd, swe.MOON)[1]
+                    in_panaphara_deg = (_a <= moon_deg) & (moon_deg <= _b)
+                    return in_nakshatra & in_panaphara_deg
                 
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
+                for s_utc, e_utc in ctx.find_intervals(is_true_arr):
                     moon_lon_start = body_lon_sid(s_utc, swe.MOON)
                     moon_sidx, moon_deg = sign_and_deg(moon_lon_start)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_num = ((moon_sidx - natal_asc_idx) % 12) + 1
+                    house_num = ctx.house_of_sign[moon_sidx]
                     
-                    rows.append({
+                    rows.append(transit_row(s_utc, e_utc, {
                         "category": "Money",
                         "rule": "Rule #2",
                         "body": "Moon",
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
                         "sign": SIGNS[moon_sidx],
                         "house": house_num,
                         "window": window_str(a, b),
                         "description": f"Moon in {nak_name} (owned by {planet_name} - PP planet) + Panaphara degree → Money",
-                    })
+                    }))
     
     return rows
 
-def compute_rule3_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule3_rows(ctx):
     """Money Rule #3: D9 Dispositor of 2L in Panaphara houses + degrees"""
     rows = []
     
-    d9_info = natal_chart.get("D9_SecondLord_Dispositor")
+    d9_info = ctx.natal_chart.get("D9_SecondLord_Dispositor")
     if not d9_info:
         return rows
     
@@ -428,86 +976,86 @@ def compute_rule3_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         return rows
     
     dispositor_id = PLANET_MAP[dispositor_name]
-    panaphara_house_signs = set(natal_chart["PanapharaHouseSigns"])
+    panaphara_house_signs = ctx.natal_chart["PanapharaHouseSignsSorted"]
     
     for a, b in PANAPHARA_WINDOWS:
-        for sign_idx in sorted(panaphara_house_signs):
-            def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx):
-                lon = body_lon_sid(dt_utc, dispositor_id)
-                sidx, deg = sign_and_deg(lon)
-                return (sidx == _sidx) and (_a <= deg <= _b)
-
-            for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                s_loc = s_utc.astimezone(tz)
-                e_loc = e_utc.astimezone(tz)
-                natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                
-                rows.append({
-                    "category": "Money",
-                    "rule": "Rule #3",
-                    "body": dispositor_name,
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": SIGNS[sign_idx],
-                    "house": house_num,
-                    "window": window_str(a, b),
-                    "description": f"{dispositor_name} (D9 dispositor of 2L) in Panaphara house ({house_num}) + degree → Money",
-                })
+        for sign_idx in panaphara_house_signs:
+            intervals = ctx.window_intervals(dispositor_id, sign_idx, a, b)
+            if not intervals:
+                continue
+            house_num = ctx.house_of_sign[sign_idx]
+
+            fields = {
+                "category": "Money",
+                "rule": "Rule #3",
+                "body": dispositor_name,
+                "sign": SIGNS[sign_idx],
+                "house": house_num,
+                "window": window_str(a, b),
+                "description": f"{dispositor_name} (D9 dispositor of 2L) in Panaphara house ({house_num}) + degree → Money",
+            }
+            rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule4_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule4_rows(ctx):
     """Money Rule #4: Venus and Uranus both in Panaphara houses + degrees (Crorepati Yoga)"""
     rows = []
     
-    panaphara_house_signs = set(natal_chart["PanapharaHouseSigns"])
+    # PLANET_MAP only carries Uranus when this pyswisseph build has it
+    uranus_id = PLANET_MAP.get("Uranus")
+    if uranus_id is None:
+        return rows
+    panaphara_house_signs = ctx.natal_chart["PanapharaHouseSignsSorted"]
+    
+    # Venus and Uranus memberships are independent: build each planet's
+    # (sign, window) masks once and AND them per sign pair
+    jd_grid = ctx.scan_grid()
+    v_sidx, v_deg = body_sign_and_deg_array(jd_grid, swe.VENUS)
+    u_sidx, u_deg = body_sign_and_deg_array(jd_grid, uranus_id)
     
     for a, b in PANAPHARA_WINDOWS:
-        for sign_idx_v in sorted(panaphara_house_signs):
-            for sign_idx_u in sorted(panaphara_house_signs):
-                def is_true_fn(dt_utc, _a=a, _b=b, _sidx_v=sign_idx_v, _sidx_u=sign_idx_u):
-                    venus_lon = body_lon_sid(dt_utc, swe.VENUS)
-                    uranus_lon = body_lon_sid(dt_utc, swe.URANUS) if hasattr(swe, "URANUS") else None
-                    v_sidx, v_deg = sign_and_deg(venus_lon)
-                    u_sidx, u_deg = sign_and_deg(uranus_lon) if uranus_lon is not None else (None, None)
-                    
-                    venus_ok = (v_sidx == _sidx_v) and (_a <= v_deg <= _b)
-                    uranus_ok = (u_sidx == _sidx_u) and (_a <= u_deg <= _b) if uranus_lon is not None else False
-                    
-                    return venus_ok and uranus_ok
-
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_v = ((sign_idx_v - natal_asc_idx) % 12) + 1
-                    house_u = ((sign_idx_u - natal_asc_idx) % 12) + 1
-                    
-                    rows.append({
-                        "category": "Money",
-                        "rule": "Rule #4",
-                        "body": "Venus/Uranus",
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
-                        "sign": f"{SIGNS[sign_idx_v]} / {SIGNS[sign_idx_u]}",
-                        "house": f"{house_v} / {house_u}",
-                        "window": window_str(a, b),
-                        "description": f"Venus in {house_v}H + Uranus in {house_u}H (both Panaphara + degree) → Crorepati Yoga",
-                    })
+        venus_hits = {s: sign_window_mask(v_sidx, v_deg, s, a, b) for s in panaphara_house_signs}
+        uranus_hits = {s: sign_window_mask(u_sidx, u_deg, s, a, b) for s in panaphara_house_signs}
+        for sign_idx_v in panaphara_house_signs:
+            if not venus_hits[sign_idx_v].any():
+                continue
+            for sign_idx_u in panaphara_house_signs:
+                grid_mask = venus_hits[sign_idx_v] & uranus_hits[sign_idx_u]
+                if not grid_mask.any():
+                    continue
+                
+                def is_true_arr(jd, _a=a, _b=b, _sidx_v=sign_idx_v, _sidx_u=sign_idx_u):
+                    v_sidx, v_deg = body_sign_and_deg_array(jd, swe.VENUS)
+                    u_sidx, u_deg = body_sign_and_deg_array(jd, uranus_id)
+                    return (sign_window_mask(v_sidx, v_deg, _sidx_v, _a, _b)
+                            & sign_window_mask(u_sidx, u_deg, _sidx_u, _a, _b))
+
+                intervals = ctx.find_intervals(is_true_arr, grid_mask=grid_mask)
+                if not intervals:
+                    continue
+                house_v = ctx.house_of_sign[sign_idx_v]
+                house_u = ctx.house_of_sign[sign_idx_u]
+
+                fields = {
+                    "category": "Money",
+                    "rule": "Rule #4",
+                    "body": "Venus/Uranus",
+                    "sign": f"{SIGNS[sign_idx_v]} / {SIGNS[sign_idx_u]}",
+                    "house": f"{house_v} / {house_u}",
+                    "window": window_str(a, b),
+                    "description": f"Venus in {house_v}H + Uranus in {house_u}H (both Panaphara + degree) → Crorepati Yoga",
+                }
+                rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule5_rows(ctx):
     """Money Rule #5: 5L and 9L in same sign OR mutual aspect (7th from each other)"""
     rows = []
     
-    fifth_lord = natal_chart.get("FifthLord")
-    ninth_lord = natal_chart.get("NinthLord")
+    fifth_lord = ctx.natal_chart.get("FifthLord")
+    ninth_lord = ctx.natal_chart.get("NinthLord")
     
     if not fifth_lord or not ninth_lord:
         return rows
@@ -518,74 +1066,70 @@ def compute_rule5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
     fifth_lord_id = PLANET_MAP[fifth_lord]
     ninth_lord_id = PLANET_MAP[ninth_lord]
     
+    # One pass over the grid for each relation; only the signs it actually
+    # visits are refined
+    jd_grid = ctx.scan_grid()
+    s5_grid = body_sign_and_deg_array(jd_grid, fifth_lord_id)[0]
+    s9_grid = body_sign_and_deg_array(jd_grid, ninth_lord_id)[0]
+    same_mask = s5_grid == s9_grid
+    opp_mask = (s5_grid.astype(np.int16) - s9_grid) % 12 == 6
+    
     # Same sign
-    for sign_idx in range(12):
-        def is_true_fn(dt_utc, _sidx=sign_idx):
-            lon5 = body_lon_sid(dt_utc, fifth_lord_id)
-            lon9 = body_lon_sid(dt_utc, ninth_lord_id)
-            s5, _ = sign_and_deg(lon5)
-            s9, _ = sign_and_deg(lon9)
-            return s5 == _sidx and s9 == _sidx
+    for sign_idx in np.unique(s5_grid[same_mask]).tolist():
+        def is_true_arr(jd, _sidx=sign_idx):
+            s5 = body_sign_and_deg_array(jd, fifth_lord_id)[0]
+            s9 = body_sign_and_deg_array(jd, ninth_lord_id)[0]
+            return (s5 == _sidx) & (s9 == _sidx)
         
-        for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-            s_loc = s_utc.astimezone(tz)
-            e_loc = e_utc.astimezone(tz)
-            natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-            house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-            
-            rows.append({
-                "category": "Money",
-                "rule": "Rule #5",
-                "body": f"{fifth_lord}/{ninth_lord}",
-                "start": s_loc,
-                "end": e_loc,
-                "start_str": fmt_dt(s_loc),
-                "end_str": fmt_dt(e_loc),
-                "sign": SIGNS[sign_idx],
-                "house": house_num,
-                "window": "Same Sign",
-                "description": f"5L ({fifth_lord}) and 9L ({ninth_lord}) in same sign ({SIGNS[sign_idx]}) → Money",
-            })
+        intervals = ctx.find_intervals(is_true_arr, grid_mask=same_mask & (s5_grid == sign_idx))
+        if not intervals:
+            continue
+        house_num = ctx.house_of_sign[sign_idx]
+
+        fields = {
+            "category": "Money",
+            "rule": "Rule #5",
+            "body": f"{fifth_lord}/{ninth_lord}",
+            "sign": SIGNS[sign_idx],
+            "house": house_num,
+            "window": "Same Sign",
+            "description": f"5L ({fifth_lord}) and 9L ({ninth_lord}) in same sign ({SIGNS[sign_idx]}) → Money",
+        }
+        rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     # Mutual 7th aspect
-    for sign_idx_5 in range(12):
+    for sign_idx_5 in np.unique(s5_grid[opp_mask]).tolist():
         sign_idx_9 = (sign_idx_5 + 6) % 12
         
-        def is_true_fn(dt_utc, _s5=sign_idx_5, _s9=sign_idx_9):
-            lon5 = body_lon_sid(dt_utc, fifth_lord_id)
-            lon9 = body_lon_sid(dt_utc, ninth_lord_id)
-            s5, _ = sign_and_deg(lon5)
-            s9, _ = sign_and_deg(lon9)
-            return s5 == _s5 and s9 == _s9
+        def is_true_arr(jd, _s5=sign_idx_5, _s9=sign_idx_9):
+            s5 = body_sign_and_deg_array(jd, fifth_lord_id)[0]
+            s9 = body_sign_and_deg_array(jd, ninth_lord_id)[0]
+            return (s5 == _s5) & (s9 == _s9)
         
-        for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-            s_loc = s_utc.astimezone(tz)
-            e_loc = e_utc.astimezone(tz)
-            natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-            house5 = ((sign_idx_5 - natal_asc_idx) % 12) + 1
-            house9 = ((sign_idx_9 - natal_asc_idx) % 12) + 1
-            
-            rows.append({
-                "category": "Money",
-                "rule": "Rule #5",
-                "body": f"{fifth_lord}/{ninth_lord}",
-                "start": s_loc,
-                "end": e_loc,
-                "start_str": fmt_dt(s_loc),
-                "end_str": fmt_dt(e_loc),
-                "sign": f"{SIGNS[sign_idx_5]} / {SIGNS[sign_idx_9]}",
-                "house": f"{house5} / {house9}",
-                "window": "7th Aspect",
-                "description": f"5L ({fifth_lord}) and 9L ({ninth_lord}) in mutual 7th aspect → Money",
-            })
+        intervals = ctx.find_intervals(is_true_arr, grid_mask=opp_mask & (s5_grid == sign_idx_5))
+        if not intervals:
+            continue
+        house5 = ctx.house_of_sign[sign_idx_5]
+        house9 = ctx.house_of_sign[sign_idx_9]
+
+        fields = {
+            "category": "Money",
+            "rule": "Rule #5",
+            "body": f"{fifth_lord}/{ninth_lord}",
+            "sign": f"{SIGNS[sign_idx_5]} / {SIGNS[sign_idx_9]}",
+            "house": f"{house5} / {house9}",
+            "window": "7th Aspect",
+            "description": f"5L ({fifth_lord}) and 9L ({ninth_lord}) in mutual 7th aspect → Money",
+        }
+        rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule6_rows(ctx):
     """Money Rule #6: 2L in Panaphara degree (any sign)"""
     rows = []
     
-    second_lord = natal_chart.get("SecondLord")
+    second_lord = ctx.natal_chart.get("SecondLord")
     if not second_lord or second_lord not in PLANET_MAP:
         return rows
     
@@ -593,41 +1137,32 @@ def compute_rule6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
     
     for a, b in PANAPHARA_WINDOWS:
         for sign_idx in range(12):
-            def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx):
-                lon = body_lon_sid(dt_utc, second_lord_id)
-                sidx, deg = sign_and_deg(lon)
-                return (sidx == _sidx) and (_a <= deg <= _b)
-
-            for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                s_loc = s_utc.astimezone(tz)
-                e_loc = e_utc.astimezone(tz)
-                natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                
-                rows.append({
-                    "category": "Money",
-                    "rule": "Rule #6",
-                    "body": second_lord,
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": SIGNS[sign_idx],
-                    "house": house_num,
-                    "window": window_str(a, b),
-                    "description": f"2L ({second_lord}) in Panaphara degree → Money",
-                })
+            intervals = ctx.window_intervals(second_lord_id, sign_idx, a, b)
+            if not intervals:
+                continue
+            house_num = ctx.house_of_sign[sign_idx]
+
+            fields = {
+                "category": "Money",
+                "rule": "Rule #6",
+                "body": second_lord,
+                "sign": SIGNS[sign_idx],
+                "house": house_num,
+                "window": window_str(a, b),
+                "description": f"2L ({second_lord}) in Panaphara degree → Money",
+            }
+            rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule7_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule7_rows(ctx):
     """Money Rule #7: Lucky Days - Apoklima lords (3L/6L/9L/12L) in apoklima houses"""
     rows = []
     
-    lucky_planets = natal_chart.get("LuckyPlanets", [])
-    extremely_lucky_planets = natal_chart.get("ExtremelyLuckyPlanets", [])
+    lucky_planets = ctx.natal_chart.get("LuckyPlanets", [])
+    extremely_lucky_planets = ctx.natal_chart.get("ExtremelyLuckyPlanets", [])
     
-    apoklima_house_signs = set(natal_chart["ApoklimaHouseSigns"])
+    apoklima_house_signs = ctx.natal_chart["ApoklimaHouseSignsSorted"]
     
     # Lucky planets (in apoklima house, not in apoklima degree)
     for planet_info in lucky_planets:
@@ -637,33 +1172,28 @@ def compute_rule7_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         
         planet_id = PLANET_MAP[planet_name]
         
-        for sign_idx in sorted(apoklima_house_signs):
-            def is_true_fn(dt_utc, _sidx=sign_idx, _pid=planet_id):
-                lon = body_lon_sid(dt_utc, _pid)
-                sidx, deg = sign_and_deg(lon)
+        for sign_idx in apoklima_house_signs:
+            def is_true_arr(jd, _sidx=sign_idx, _pid=planet_id):
+                sidx, deg = body_sign_and_deg_array(jd, _pid)
                 in_sign = (sidx == _sidx)
-                not_in_apoklima_deg = not degree_in_apoklima_window(deg)
-                return in_sign and not_in_apoklima_deg
-
-            for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                s_loc = s_utc.astimezone(tz)
-                e_loc = e_utc.astimezone(tz)
-                natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                
-                rows.append({
-                    "category": "Money",
-                    "rule": "Rule #7 (Lucky)",
-                    "body": planet_name,
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": SIGNS[sign_idx],
-                    "house": house_num,
-                    "window": "Apoklima House",
-                    "description": f"{planet_name} ({planet_info['lord_type']}) in Apoklima house ({house_num}) → Lucky Day",
-                })
+                not_in_apoklima_deg = ~degree_in_apoklima_window(deg)
+                return in_sign & not_in_apoklima_deg
+
+            intervals = ctx.find_intervals(is_true_arr)
+            if not intervals:
+                continue
+            house_num = ctx.house_of_sign[sign_idx]
+
+            fields = {
+                "category": "Money",
+                "rule": "Rule #7 (Lucky)",
+                "body": planet_name,
+                "sign": SIGNS[sign_idx],
+                "house": house_num,
+                "window": "Apoklima House",
+                "description": f"{planet_name} ({planet_info['lord_type']}) in Apoklima house ({house_num}) → Lucky Day",
+            }
+            rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     # Extremely lucky planets (in apoklima house + apoklima degree)
     for planet_info in extremely_lucky_planets:
@@ -674,44 +1204,42 @@ def compute_rule7_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         planet_id = PLANET_MAP[planet_name]
         
         for a, b in APOKLIMA_WINDOWS:
-            for sign_idx in sorted(apoklima_house_signs):
-                def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx, _pid=planet_id):
-                    lon = body_lon_sid(dt_utc, _pid)
-                    sidx, deg = sign_and_deg(lon)
-                    return (sidx == _sidx) and (_a <= deg <= _b)
-
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                    
-                    rows.append({
-                        "category": "Money",
-                        "rule": "Rule #7 (Extremely Lucky)",
-                        "body": planet_name,
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
-                        "sign": SIGNS[sign_idx],
-                        "house": house_num,
-                        "window": window_str(a, b),
-                        "description": f"{planet_name} ({planet_info['lord_type']}) in Apoklima house ({house_num}) + Apoklima degree → Extremely Lucky Day",
-                    })
+            for sign_idx in apoklima_house_signs:
+                intervals = ctx.window_intervals(planet_id, sign_idx, a, b)
+                if not intervals:
+                    continue
+                house_num = ctx.house_of_sign[sign_idx]
+
+                fields = {
+                    "category": "Money",
+                    "rule": "Rule #7 (Extremely Lucky)",
+                    "body": planet_name,
+                    "sign": SIGNS[sign_idx],
+                    "house": house_num,
+                    "window": window_str(a, b),
+                    "description": f"{planet_name} ({planet_info['lord_type']}) in Apoklima house ({house_num}) + Apoklima degree → Extremely Lucky Day",
+                }
+                rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_rule8_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_rule8_rows(ctx):
     """Money Rule #8: Transit planet touches natal PP planet degree (±1° orb)"""
     rows = []
     
-    panaphara_planets = natal_chart.get("PanapharaPlanets", [])
+    panaphara_planets = ctx.natal_chart.get("PanapharaPlanets", [])
     if not panaphara_planets:
         return rows
     
     ORB = 1.0
     
+    # (body, sample) sign/degree matrices of every transiting body, so each
+    # PP planet's orb is tested against all of them in one broadcast
+    jd_grid = ctx.scan_grid()
+    splits = [body_sign_and_deg_array(jd_grid, body_id) for body_id in GRID_BODIES]
+    sidx_matrix = np.stack([sidx for sidx, _ in splits])
+    deg_matrix = np.stack([deg for _, deg in splits])
+    
     for pp_info in panaphara_planets:
         pp_name = pp_info["name"]
         pp_sign_idx = pp_info["sign_index"]
@@ -721,113 +1249,72 @@ def compute_rule8_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         min_deg = pp_deg - ORB
         max_deg = pp_deg + ORB
         
-        # Check all transiting planets
-        for transit_name, transit_id in PLANET_MAP.items():
-            def is_true_fn(dt_utc, _pp_sign=pp_sign_idx, _min=min_deg, _max=max_deg, _tid=transit_id):
-                lon = body_lon_sid(dt_utc, _tid)
-                sidx, deg = sign_and_deg(lon)
-                if sidx != _pp_sign:
-                    return False
-                return (_min <= deg <= _max)
-
-            for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                s_loc = s_utc.astimezone(tz)
-                e_loc = e_utc.astimezone(tz)
-                natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                house_num = ((pp_sign_idx - natal_asc_idx) % 12) + 1
-                
-                rows.append({
-                    "category": "Money",
-                    "rule": "Rule #8",
-                    "body": transit_name,
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": pp_sign,
-                    "house": house_num,
-                    "window": f"{dms_short(pp_deg)} ±1°",
-                    "description": f"{transit_name} touches natal {pp_name} degree ({dms_short(pp_deg)}) in {pp_sign} → Money",
-                })
+        # Check all transiting planets; only bodies that touch the orb are refined
+        mask_matrix = sign_window_mask(sidx_matrix, deg_matrix, pp_sign_idx, min_deg, max_deg)
+        for k in np.flatnonzero(mask_matrix.any(axis=1)).tolist():
+            transit_name, transit_id = GRID_BODY_NAMES[k], GRID_BODIES[k]
+            
+            def is_true_arr(jd, _pp_sign=pp_sign_idx, _min=min_deg, _max=max_deg, _tid=transit_id):
+                sidx, deg = body_sign_and_deg_array(jd, _tid)
+                return sign_window_mask(sidx, deg, _pp_sign, _min, _max)
+
+            intervals = ctx.find_intervals(is_true_arr, grid_mask=mask_matrix[k])
+            if not intervals:
+                continue
+            house_num = ctx.house_of_sign[pp_sign_idx]
+
+            fields = {
+                "category": "Money",
+                "rule": "Rule #8",
+                "body": transit_name,
+                "sign": pp_sign,
+                "house": house_num,
+                "window": f"{dms_short(pp_deg)} ±1°",
+                "description": f"{transit_name} touches natal {pp_name} degree ({dms_short(pp_deg)}) in {pp_sign} → Money",
+            }
+            rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_loss1_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss1_rows(ctx):
     """Loss #1: Saturn/Venus/Ketu in natal apoklima houses (3/6/9/12) + apoklima degrees → Loss"""
     rows = []
-    apoklima_house_signs = set(natal_chart["ApoklimaHouseSigns"])
+    apoklima_house_signs = ctx.natal_chart["ApoklimaHouseSignsSorted"]
     
     bodies_to_check = [
         ("Saturn", swe.SATURN),
         ("Venus", swe.VENUS),
+        ("Ketu", KETU),
     ]
     
     for body_name, body_id in bodies_to_check:
         for a, b in APOKLIMA_WINDOWS:
-            for sign_idx in sorted(apoklima_house_signs):
-                def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx, _bid=body_id):
-                    lon = body_lon_sid(dt_utc, _bid)
-                    sidx, deg = sign_and_deg(lon)
-                    return (sidx == _sidx) and (_a <= deg <= _b)
-
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                    
-                    rows.append({
-                        "category": "Loss",
-                        "rule": "Loss #1",
-                        "body": body_name,
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
-                        "sign": SIGNS[sign_idx],
-                        "house": house_num,
-                        "window": window_str(a, b),
-                        "description": f"{body_name} in Apoklima house ({house_num}) + Apoklima degree → Loss",
-                    })
-    
-    # Ketu
-    for a, b in APOKLIMA_WINDOWS:
-        for sign_idx in sorted(apoklima_house_signs):
-            def is_true_fn(dt_utc, _a=a, _b=b, _sidx=sign_idx):
-                rahu_lon = body_lon_sid(dt_utc, swe.MEAN_NODE)
-                ketu_lon = wrap360(rahu_lon + 180.0)
-                sidx, deg = sign_and_deg(ketu_lon)
-                return (sidx == _sidx) and (_a <= deg <= _b)
-
-            for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                s_loc = s_utc.astimezone(tz)
-                e_loc = e_utc.astimezone(tz)
-                natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                house_num = ((sign_idx - natal_asc_idx) % 12) + 1
-                
-                rows.append({
+            for sign_idx in apoklima_house_signs:
+                intervals = ctx.window_intervals(body_id, sign_idx, a, b)
+                if not intervals:
+                    continue
+                house_num = ctx.house_of_sign[sign_idx]
+
+                fields = {
                     "category": "Loss",
                     "rule": "Loss #1",
-                    "body": "Ketu",
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
+                    "body": body_name,
                     "sign": SIGNS[sign_idx],
                     "house": house_num,
                     "window": window_str(a, b),
-                    "description": f"Ketu in Apoklima house ({house_num}) + Apoklima degree → Loss",
-                })
+                    "description": f"{body_name} in Apoklima house ({house_num}) + Apoklima degree → Loss",
+                }
+                rows.extend(transit_row(s_utc, e_utc, fields) for s_utc, e_utc in intervals)
     
     return rows
 
-def compute_loss2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss2_rows(ctx):
     """Loss #2: Sun in natal 6L/8L/12L nakshatras + apoklima degrees → Loss"""
     rows = []
     
-    sixth_lord = natal_chart.get("SixthLord")
-    eighth_lord = natal_chart.get("EighthLord")
-    twelfth_lord = natal_chart.get("TwelfthLord")
+    sixth_lord = ctx.natal_chart.get("SixthLord")
+    eighth_lord = ctx.natal_chart.get("EighthLord")
+    twelfth_lord = ctx.natal_chart.get("TwelfthLord")
     
     malefic_lords = set()
     if sixth_lord:
@@ -841,185 +1328,140 @@ def compute_loss2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
         return rows
     
     for lord_name in malefic_lords:
-        nak_indices = [i for i, nak_lord in enumerate(NAKSHATRA_LORDS) if nak_lord == lord_name]
+        nak_indices = NAK_INDICES_BY_LORD.get(lord_name, ())
+        
+        lord_type = ""
+        if lord_name == sixth_lord:
+            lord_type = "6L"
+        if lord_name == eighth_lord:
+            lord_type = "8L" if not lord_type else lord_type + "/8L"
+        if lord_name == twelfth_lord:
+            lord_type = "12L" if not lord_type else lord_type + "/12L"
         
         for nak_idx in nak_indices:
             nak_name = NAKSHATRAS[nak_idx]
-            nak_start_lon = nak_idx * (360.0 / 27.0)
-            nak_end_lon = (nak_idx + 1) * (360.0 / 27.0)
             
             for a, b in APOKLIMA_WINDOWS:
-                def is_true_fn(dt_utc, _nak_start=nak_start_lon, _nak_end=nak_end_lon, _a=a, _b=b):
-                    sun_lon = body_lon_sid(dt_utc, swe.SUN)
-                    sun_lon = wrap360(sun_lon)
-                    in_nakshatra = (_nak_start <= sun_lon < _nak_end)
-                    _, sun_deg = sign_and_deg(sun_lon)
-                    in_apoklima_deg = (_a <= sun_deg <= _b)
-                    return in_nakshatra and in_apoklima_deg
+                def is_true_arr(jd, _nak=nak_idx, _a=a, _b=b):
+                    in_nakshatra = body_nak_idx_array(jd, swe.SUN) == _nak
+                    sun_deg = body_sign_and_deg_array(jd, swe.SUN)[1]
+                    in_apoklima_deg = (_a <= sun_deg) & (sun_deg <= _b)
+                    return in_nakshatra & in_apoklima_deg
                 
-                for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-                    s_loc = s_utc.astimezone(tz)
-                    e_loc = e_utc.astimezone(tz)
+                for s_utc, e_utc in ctx.find_intervals(is_true_arr):
                     sun_lon_start = body_lon_sid(s_utc, swe.SUN)
                     sun_sidx, sun_deg = sign_and_deg(sun_lon_start)
-                    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-                    house_num = ((sun_sidx - natal_asc_idx) % 12) + 1
-                    
-                    lord_type = ""
-                    if lord_name == sixth_lord:
-                        lord_type = "6L"
-                    if lord_name == eighth_lord:
-                        lord_type = "8L" if not lord_type else lord_type + "/8L"
-                    if lord_name == twelfth_lord:
-                        lord_type = "12L" if not lord_type else lord_type + "/12L"
+                    house_num = ctx.house_of_sign[sun_sidx]
                     
-                    rows.append({
+                    rows.append(transit_row(s_utc, e_utc, {
                         "category": "Loss",
                         "rule": "Loss #2",
                         "body": "Sun",
-                        "start": s_loc,
-                        "end": e_loc,
-                        "start_str": fmt_dt(s_loc),
-                        "end_str": fmt_dt(e_loc),
                         "sign": SIGNS[sun_sidx],
                         "house": house_num,
                         "window": window_str(a, b),
                         "description": f"Sun in {nak_name} (owned by {lord_name} - {lord_type}) + Apoklima degree → Loss",
-                    })
+                    }))
     
     return rows
 
-def compute_loss3_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss3_rows(ctx):
     """Loss #3: Moon in 6th nakshatra from natal Moon OR Sun in 6th nakshatra from natal Sun → Loss"""
     rows = []
     
     # Moon's 6th nakshatra
-    natal_moon_lon = natal_chart["Moon"]["longitude"]
-    natal_moon_nak_idx = int(natal_moon_lon / (360.0 / 27.0))
+    natal_moon_lon = ctx.natal_chart["Moon"]["longitude"]
+    natal_moon_nak_idx = math.floor(natal_moon_lon * _NAK_RECIP)
     sixth_nak_from_moon = (natal_moon_nak_idx + 5) % 27  # 6th nakshatra (0-indexed, so +5)
     sixth_nak_name_moon = NAKSHATRAS[sixth_nak_from_moon]
     
-    nak_start_lon = sixth_nak_from_moon * (360.0 / 27.0)
-    nak_end_lon = (sixth_nak_from_moon + 1) * (360.0 / 27.0)
-    
-    def is_moon_in_sixth_nak(dt_utc, _nak_start=nak_start_lon, _nak_end=nak_end_lon):
-        moon_lon = body_lon_sid(dt_utc, swe.MOON)
-        moon_lon = wrap360(moon_lon)
-        return (_nak_start <= moon_lon < _nak_end)
+    def is_moon_in_sixth_nak(jd):
+        return body_nak_idx_array(jd, swe.MOON) == sixth_nak_from_moon
     
-    for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_moon_in_sixth_nak, step_seconds, refine_to_seconds):
-        s_loc = s_utc.astimezone(tz)
-        e_loc = e_utc.astimezone(tz)
+    for s_utc, e_utc in ctx.find_intervals(is_moon_in_sixth_nak):
         moon_lon_start = body_lon_sid(s_utc, swe.MOON)
         moon_sidx, moon_deg = sign_and_deg(moon_lon_start)
-        natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-        house_num = ((moon_sidx - natal_asc_idx) % 12) + 1
+        house_num = ctx.house_of_sign[moon_sidx]
         
-        natal_moon_nak_name = natal_chart["Moon"]["nakshatra"]
+        natal_moon_nak_name = ctx.natal_chart["Moon"]["nakshatra"]
         
-        rows.append({
+        rows.append(transit_row(s_utc, e_utc, {
             "category": "Loss",
             "rule": "Loss #3",
             "body": "Moon",
-            "start": s_loc,
-            "end": e_loc,
-            "start_str": fmt_dt(s_loc),
-            "end_str": fmt_dt(e_loc),
             "sign": SIGNS[moon_sidx],
             "house": house_num,
             "window": "Full Nakshatra",
             "description": f"Moon in {sixth_nak_name_moon} (6th nakshatra from natal Moon's {natal_moon_nak_name}) → Loss",
-        })
+        }))
     
     # Sun's 6th nakshatra
-    natal_sun_lon = natal_chart["Sun"]["longitude"]
-    natal_sun_nak_idx = int(natal_sun_lon / (360.0 / 27.0))
+    natal_sun_lon = ctx.natal_chart["Sun"]["longitude"]
+    natal_sun_nak_idx = math.floor(natal_sun_lon * _NAK_RECIP)
     sixth_nak_from_sun = (natal_sun_nak_idx + 5) % 27  # 6th nakshatra (0-indexed, so +5)
     sixth_nak_name_sun = NAKSHATRAS[sixth_nak_from_sun]
     
-    nak_start_lon_sun = sixth_nak_from_sun * (360.0 / 27.0)
-    nak_end_lon_sun = (sixth_nak_from_sun + 1) * (360.0 / 27.0)
-    
-    def is_sun_in_sixth_nak(dt_utc, _nak_start=nak_start_lon_sun, _nak_end=nak_end_lon_sun):
-        sun_lon = body_lon_sid(dt_utc, swe.SUN)
-        sun_lon = wrap360(sun_lon)
-        return (_nak_start <= sun_lon < _nak_end)
+    def is_sun_in_sixth_nak(jd):
+        return body_nak_idx_array(jd, swe.SUN) == sixth_nak_from_sun
     
-    for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_sun_in_sixth_nak, step_seconds, refine_to_seconds):
-        s_loc = s_utc.astimezone(tz)
-        e_loc = e_utc.astimezone(tz)
+    for s_utc, e_utc in ctx.find_intervals(is_sun_in_sixth_nak):
         sun_lon_start = body_lon_sid(s_utc, swe.SUN)
         sun_sidx, sun_deg = sign_and_deg(sun_lon_start)
-        natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-        house_num = ((sun_sidx - natal_asc_idx) % 12) + 1
+        house_num = ctx.house_of_sign[sun_sidx]
         
-        natal_sun_nak_name = natal_chart["Sun"]["nakshatra"]
+        natal_sun_nak_name = ctx.natal_chart["Sun"]["nakshatra"]
         
-        rows.append({
+        rows.append(transit_row(s_utc, e_utc, {
             "category": "Loss",
             "rule": "Loss #3",
             "body": "Sun",
-            "start": s_loc,
-            "end": e_loc,
-            "start_str": fmt_dt(s_loc),
-            "end_str": fmt_dt(e_loc),
             "sign": SIGNS[sun_sidx],
             "house": house_num,
             "window": "Full Nakshatra",
             "description": f"Sun in {sixth_nak_name_sun} (6th nakshatra from natal Sun's {natal_sun_nak_name}) → Loss",
-        })
+        }))
     
     return rows
 
-def compute_loss4_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss4_rows(ctx):
     """Loss #4: Moon conjunct natal Neptune degree (±1° orb) → Loss"""
     rows = []
     
-    natal_neptune_deg = natal_chart["Neptune"]["degree"]
-    natal_neptune_sign_idx = natal_chart["Neptune"]["sign_index"]
-    natal_neptune_sign = natal_chart["Neptune"]["sign"]
+    natal_neptune_deg = ctx.natal_chart["Neptune"]["degree"]
+    natal_neptune_sign_idx = ctx.natal_chart["Neptune"]["sign_index"]
+    natal_neptune_sign = ctx.natal_chart["Neptune"]["sign"]
     
     ORB = 1.0
     min_deg = natal_neptune_deg - ORB
     max_deg = natal_neptune_deg + ORB
     
-    def is_true_fn(dt_utc, _natal_sign_idx=natal_neptune_sign_idx, _min_deg=min_deg, _max_deg=max_deg):
-        moon_lon = body_lon_sid(dt_utc, swe.MOON)
-        sidx, deg = sign_and_deg(moon_lon)
-        if sidx != _natal_sign_idx:
-            return False
-        return (_min_deg <= deg <= _max_deg)
+    def is_true_arr(jd, _natal_sign_idx=natal_neptune_sign_idx, _min_deg=min_deg, _max_deg=max_deg):
+        sidx, deg = body_sign_and_deg_array(jd, swe.MOON)
+        return sign_window_mask(sidx, deg, _natal_sign_idx, _min_deg, _max_deg)
     
-    for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-        s_loc = s_utc.astimezone(tz)
-        e_loc = e_utc.astimezone(tz)
+    for s_utc, e_utc in ctx.find_intervals(is_true_arr):
         moon_lon_start = body_lon_sid(s_utc, swe.MOON)
         moon_sidx, moon_deg = sign_and_deg(moon_lon_start)
-        natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-        house_num = ((moon_sidx - natal_asc_idx) % 12) + 1
+        house_num = ctx.house_of_sign[moon_sidx]
         
-        rows.append({
+        rows.append(transit_row(s_utc, e_utc, {
             "category": "Loss",
             "rule": "Loss #4",
             "body": "Moon",
-            "start": s_loc,
-            "end": e_loc,
-            "start_str": fmt_dt(s_loc),
-            "end_str": fmt_dt(e_loc),
             "sign": natal_neptune_sign,
             "house": house_num,
             "window": f"{dms_short(natal_neptune_deg)} ±1°",
             "description": f"Moon conjunct Natal Neptune degree ({dms_short(natal_neptune_deg)}) in {natal_neptune_sign} → Loss",
-        })
+        }))
     
     return rows
 
-def compute_loss5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss5_rows(ctx):
     """Loss #5: Natal 6L and 8L in 6/8 relationship (sign-only) → EXPENSE"""
     rows = []
     
-    sixth_lord = natal_chart.get("SixthLord")
-    eighth_lord = natal_chart.get("EighthLord")
+    sixth_lord = ctx.natal_chart.get("SixthLord")
+    eighth_lord = ctx.natal_chart.get("EighthLord")
     
     if not sixth_lord or not eighth_lord:
         return rows
@@ -1030,67 +1472,49 @@ def compute_loss5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
     sixth_lord_id = PLANET_MAP[sixth_lord]
     eighth_lord_id = PLANET_MAP[eighth_lord]
     
-    def is_true_fn(dt_utc):
-        lon6 = body_lon_sid(dt_utc, sixth_lord_id)
-        lon8 = body_lon_sid(dt_utc, eighth_lord_id)
-        s6, _ = sign_and_deg(lon6)
-        s8, _ = sign_and_deg(lon8)
+    def is_true_arr(jd):
+        s6 = body_sign_and_deg_array(jd, sixth_lord_id)[0]
+        s8 = body_sign_and_deg_array(jd, eighth_lord_id)[0]
         
-        # Calculate house positions
-        house_6_to_8 = ((s8 - s6) % 12) + 1
-        house_8_to_6 = ((s6 - s8) % 12) + 1
-        
-        # Check if they are in 6/8 relationship
-        return (house_6_to_8 == 6 and house_8_to_6 == 8) or (house_6_to_8 == 8 and house_8_to_6 == 6)
+        # 8L is 6th from 6L (5 signs on) or 8th from it (7 signs on); the
+        # reverse count is then 8th or 6th respectively
+        signs_apart = (s8 - s6) % 12
+        return (signs_apart == 5) | (signs_apart == 7)
     
-    for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-        s_loc = s_utc.astimezone(tz)
-        e_loc = e_utc.astimezone(tz)
+    for s_utc, e_utc in ctx.find_intervals(is_true_arr):
         
         lon6_s = body_lon_sid(s_utc, sixth_lord_id)
         lon8_s = body_lon_sid(s_utc, eighth_lord_id)
         s6_idx, _ = sign_and_deg(lon6_s)
         s8_idx, _ = sign_and_deg(lon8_s)
         
-        natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-        house6 = ((s6_idx - natal_asc_idx) % 12) + 1
-        house8 = ((s8_idx - natal_asc_idx) % 12) + 1
+        house6 = ctx.house_of_sign[s6_idx]
+        house8 = ctx.house_of_sign[s8_idx]
         
-        rows.append({
+        rows.append(transit_row(s_utc, e_utc, {
             "category": "Expense",
             "rule": "Loss #5",
             "body": f"{sixth_lord}/{eighth_lord}",
-            "start": s_loc,
-            "end": e_loc,
-            "start_str": fmt_dt(s_loc),
-            "end_str": fmt_dt(e_loc),
             "sign": f"{SIGNS[s6_idx]} / {SIGNS[s8_idx]}",
             "house": f"{house6} / {house8}",
             "window": "6/8 Relation",
             "description": f"6L ({sixth_lord}) and 8L ({eighth_lord}) in 6/8 relationship → EXPENSE",
-        })
+        }))
     
     return rows
 
-def compute_loss6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds):
+def compute_loss6_rows(ctx):
     """Loss #6: Sun in natal 3/6/8/12 houses → Loss (Exception: PP planet nakshatras → Money)"""
     rows = []
     
-    natal_asc_idx = natal_chart["Ascendant"]["sign_index"]
-    
-    # 3/6/8/12 house signs
-    dusthana_signs = [
-        (natal_asc_idx + 2) % 12,  # 3rd house
-        (natal_asc_idx + 5) % 12,  # 6th house
-        (natal_asc_idx + 7) % 12,  # 8th house
-        (natal_asc_idx + 11) % 12, # 12th house
-    ]
+    # 3/6/8/12 house signs, as a sign-index lookup table
+    dusthana_lut = np.array([house in (3, 6, 8, 12) for house in ctx.house_of_sign])
     
     # PP planet nakshatras (exception) - excluding Swati
-    panaphara_planets = natal_chart.get("PanapharaPlanets", [])
-    second_lord = natal_chart.get("SecondLord")
-    fifth_lord = natal_chart.get("FifthLord")
-    ninth_lord = natal_chart.get("NinthLord")
+    panaphara_planets = ctx.natal_chart.get("PanapharaPlanets", [])
+    second_lord = ctx.natal_chart.get("SecondLord")
+    fifth_lord = ctx.natal_chart.get("FifthLord")
+    ninth_lord = ctx.natal_chart.get("NinthLord")
     
     pp_planet_names = set()
     for pp in panaphara_planets:
@@ -1102,127 +1526,249 @@ def compute_loss6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine
     if ninth_lord:
         pp_planet_names.add(ninth_lord)
     
-    pp_nak_indices = set()
-    for planet_name in pp_planet_names:
-        nak_indices = [i for i, lord in enumerate(NAKSHATRA_LORDS) if lord == planet_name]
-        pp_nak_indices.update(nak_indices)
-    
     # Exclude Swati (14th nakshatra, index 14)
     swati_idx = 14
-    if swati_idx in pp_nak_indices:
-        pp_nak_indices.remove(swati_idx)
-    
-    for sign_idx in dusthana_signs:
-        def is_true_fn(dt_utc, _sidx=sign_idx):
-            sun_lon = body_lon_sid(dt_utc, swe.SUN)
-            sidx, _ = sign_and_deg(sun_lon)
-            return sidx == _sidx
-        
-        for s_utc, e_utc in find_true_intervals(start_utc, end_utc, is_true_fn, step_seconds, refine_to_seconds):
-            s_loc = s_utc.astimezone(tz)
-            e_loc = e_utc.astimezone(tz)
-            sun_lon_start = body_lon_sid(s_utc, swe.SUN)
-            sun_sidx, sun_deg = sign_and_deg(sun_lon_start)
-            house_num = ((sun_sidx - natal_asc_idx) % 12) + 1
-            
-            # Check if Sun is in PP planet nakshatra
-            sun_nak_idx = int(sun_lon_start / (360.0 / 27.0))
-            sun_nak_name = NAKSHATRAS[sun_nak_idx]
-            sun_nak_lord = NAKSHATRA_LORDS[sun_nak_idx]
-            
-            if sun_nak_idx in pp_nak_indices:
-                # Exception: Money
-                rows.append({
-                    "category": "Money",
-                    "rule": "Loss #6 (Exception)",
-                    "body": "Sun",
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": SIGNS[sun_sidx],
-                    "house": house_num,
-                    "window": "Full Sign",
-                    "description": f"Sun in {house_num}H ({SIGNS[sun_sidx]}) in {sun_nak_name} (owned by {sun_nak_lord} - PP planet) → Money",
-                })
-            else:
-                # Loss
-                rows.append({
-                    "category": "Loss",
-                    "rule": "Loss #6",
-                    "body": "Sun",
-                    "start": s_loc,
-                    "end": e_loc,
-                    "start_str": fmt_dt(s_loc),
-                    "end_str": fmt_dt(e_loc),
-                    "sign": SIGNS[sun_sidx],
-                    "house": house_num,
-                    "window": "Full Sign",
-                    "description": f"Sun in {house_num}H ({SIGNS[sun_sidx]}) in {sun_nak_name} → Loss",
-                })
+    pp_nak_indices = frozenset().union(
+        *(NAK_INDICES_BY_LORD.get(name, ()) for name in pp_planet_names)) - {swati_idx}
     
+    # One scan over all four signs: no two dusthana houses are adjacent, so a
+    # stay in one never runs into another
+    def is_true_arr(jd):
+        return dusthana_lut[body_sign_and_deg_array(jd, swe.SUN)[0]]
+    
+    for s_utc, e_utc in ctx.find_intervals(is_true_arr):
+        sun_lon_start = body_lon_sid(s_utc, swe.SUN)
+        sun_sidx, sun_deg = sign_and_deg(sun_lon_start)
+        house_num = ctx.house_of_sign[sun_sidx]
+        
+        # Check if Sun is in PP planet nakshatra
+        sun_nak_idx, sun_nak_name, sun_nak_lord = get_nakshatra_from_longitude(sun_lon_start)
+        
+        if sun_nak_idx in pp_nak_indices:
+            # Exception: Money
+            rows.append(transit_row(s_utc, e_utc, {
+                "category": "Money",
+                "rule": "Loss #6 (Exception)",
+                "body": "Sun",
+                "sign": SIGNS[sun_sidx],
+                "house": house_num,
+                "window": "Full Sign",
+                "description": f"Sun in {house_num}H ({SIGNS[sun_sidx]}) in {sun_nak_name} (owned by {sun_nak_lord} - PP planet) → Money",
+            }))
+        else:
+            # Loss
+            rows.append(transit_row(s_utc, e_utc, {
+                "category": "Loss",
+                "rule": "Loss #6",
+                "body": "Sun",
+                "sign": SIGNS[sun_sidx],
+                "house": house_num,
+                "window": "Full Sign",
+                "description": f"Sun in {house_num}H ({SIGNS[sun_sidx]}) in {sun_nak_name} → Loss",
+            }))
+
     return rows
 
-def compute_all_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds, enabled_rules):
-    """Compute all transit rows based on enabled rules"""
-    rows = []
-    
+# Rule scans in the order they are run, keyed by their enable_* form field
+RULE_FUNCTIONS = [
     # Money Rules
-    if enabled_rules.get("enable_rule1"):
-        rows.extend(compute_rule1_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule2"):
-        rows.extend(compute_rule2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule3"):
-        rows.extend(compute_rule3_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule4"):
-        rows.extend(compute_rule4_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule5"):
-        rows.extend(compute_rule5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule6"):
-        rows.extend(compute_rule6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule7"):
-        rows.extend(compute_rule7_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_rule8"):
-        rows.extend(compute_rule8_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
+    ("enable_rule1", compute_rule1_rows),
+    ("enable_rule2", compute_rule2_rows),
+    ("enable_rule3", compute_rule3_rows),
+    ("enable_rule4", compute_rule4_rows),
+    ("enable_rule5", compute_rule5_rows),
+    ("enable_rule6", compute_rule6_rows),
+    ("enable_rule7", compute_rule7_rows),
+    ("enable_rule8", compute_rule8_rows),
     # Loss Rules
-    if enabled_rules.get("enable_loss1"):
-        rows.extend(compute_loss1_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_loss2"):
-        rows.extend(compute_loss2_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_loss3"):
-        rows.extend(compute_loss3_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_loss4"):
-        rows.extend(compute_loss4_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_loss5"):
-        rows.extend(compute_loss5_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    if enabled_rules.get("enable_loss6"):
-        rows.extend(compute_loss6_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds))
-    
-    # Sort by start time
-    rows.sort(key=lambda r: r["start"])
+    ("enable_loss1", compute_loss1_rows),
+    ("enable_loss2", compute_loss2_rows),
+    ("enable_loss3", compute_loss3_rows),
+    ("enable_loss4", compute_loss4_rows),
+    ("enable_loss5", compute_loss5_rows),
+    ("enable_loss6", compute_loss6_rows),
+]
+RULE_FUNCTION_MAP = dict(RULE_FUNCTIONS)
+
+def _chart_names(natal_chart, key):
+    return [info["name"] for info in natal_chart.get(key, [])]
+
+# Transit bodies each rule reads, by planet name, for a given natal chart
+# (Ketu is derived from the Rahu row, so rules reading Ketu list "Rahu")
+RULE_BODIES = {
+    "enable_rule1": lambda chart: ["Jupiter", "Venus", chart.get("SecondLord")],
+    "enable_rule2": lambda chart: ["Moon"],
+    "enable_rule3": lambda chart: [(chart.get("D9_SecondLord_Dispositor") or {}).get("dispositor")],
+    "enable_rule4": lambda chart: ["Venus", "Uranus"],
+    "enable_rule5": lambda chart: [chart.get("FifthLord"), chart.get("NinthLord")],
+    "enable_rule6": lambda chart: [chart.get("SecondLord")],
+    "enable_rule7": lambda chart: (_chart_names(chart, "LuckyPlanets")
+                                   + _chart_names(chart, "ExtremelyLuckyPlanets")),
+    "enable_rule8": lambda chart: GRID_BODY_NAMES,
+    "enable_loss1": lambda chart: ["Saturn", "Venus", "Rahu"],
+    "enable_loss2": lambda chart: ["Sun"],
+    "enable_loss3": lambda chart: ["Moon", "Sun"],
+    "enable_loss4": lambda chart: ["Moon"],
+    "enable_loss5": lambda chart: [chart.get("SixthLord"), chart.get("EighthLord")],
+    "enable_loss6": lambda chart: ["Sun"],
+}
+
+def bodies_for_rules(rule_keys, natal_chart):
+    """Swiss Ephemeris ids the given rules read, deduplicated in GRID_BODIES order
+    (a rule missing from RULE_BODIES reads all of them)"""
+    sample_all = lambda chart: GRID_BODY_NAMES
+    names = {name for key in rule_keys
+             for name in RULE_BODIES.get(key, sample_all)(natal_chart)}
+    return tuple(body_id for name, body_id in zip(GRID_BODY_NAMES, GRID_BODIES)
+                 if name in names)
+
+def enabled_rules_from_form(form):
+    """enable_* checkbox states of a submitted form, one entry per rule"""
+    return {key: form.get(key) == 'on' for key, _ in RULE_FUNCTIONS}
+
+# pyswisseph holds the GIL inside calc_ut, so threads cannot overlap scans.
+# With SCAN_WORKERS > 1, enabled rules are scanned in worker processes instead.
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", "1"))
+_scan_pool = None
+
+def _get_scan_pool():
+    global _scan_pool
+    if _scan_pool is None:
+        # spawn, not fork: the parent forks while holding swe_lock
+        _scan_pool = ProcessPoolExecutor(max_workers=SCAN_WORKERS,
+                                         mp_context=multiprocessing.get_context("spawn"))
+    return _scan_pool
+
+def _sample_body_in_worker(ayanamsa_name, shm_name, bodies, row, ctx):
+    """Fill row `row` of the shared grid block with bodies[row]'s longitudes"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with use_ayanamsa(ayanamsa_name):
+            with ayanamsa_table(ctx.start_utc, ctx.end_utc):
+                grid = LongitudeGrid(ctx.start_utc, ctx.end_utc, ctx.step_seconds)
+                table = np.ndarray((len(bodies), len(grid.jd)), dtype=np.float64,
+                                   buffer=shm.buf)
+                table[row] = grid.lons(bodies[row])
+                del table
+    finally:
+        shm.close()
+
+def _scan_rule_in_worker(rule_key, ayanamsa_name, shm_name, bodies, ctx):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        with use_ayanamsa(ayanamsa_name):
+            with ayanamsa_table(ctx.start_utc, ctx.end_utc), \
+                    longitude_grid(ctx.start_utc, ctx.end_utc, ctx.step_seconds,
+                                   shm.buf, bodies):
+                return RULE_FUNCTION_MAP[rule_key](ctx)
+    finally:
+        shm.close()
+
+def _compute_rows_in_pool(rule_keys, ctx):
+    """Sample the bodies the rules read into shared memory (one body per task),
+    then scan each rule in its own task against that block instead of re-sampling"""
+    pool = _get_scan_pool()
+    bodies = bodies_for_rules(rule_keys, ctx.natal_chart)
+    n_steps = int((ctx.end_utc - ctx.start_utc).total_seconds() // ctx.step_seconds) + 1
+    shm = shared_memory.SharedMemory(create=True, size=max(len(bodies), 1) * n_steps * 8)
+    try:
+        sampled = [pool.submit(_sample_body_in_worker, _current_ayanamsa_name, shm.name,
+                               bodies, row, ctx)
+                   for row in range(len(bodies))]
+        for future in sampled:
+            future.result()
+        futures = [pool.submit(_scan_rule_in_worker, key, _current_ayanamsa_name, shm.name,
+                               bodies, ctx)
+                   for key in rule_keys]
+        return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+def compute_all_rows(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds, enabled_rules):
+    """Compute all transit rows based on enabled rules.
+    Must run inside a single use_ayanamsa() block; the scan never re-takes
+    swe_lock or changes the sidereal mode."""
+    assert swe_lock.locked(), "compute_all_rows must run inside use_ayanamsa()"
+    rule_keys = [key for key, _ in RULE_FUNCTIONS if enabled_rules.get(key)]
+    ctx = RuleContext(start_utc, end_utc, tz, natal_chart, step_seconds, refine_to_seconds)
+    
+    if SCAN_WORKERS > 1 and len(rule_keys) > 1 and _current_ayanamsa_name:
+        per_rule_rows = _compute_rows_in_pool(rule_keys, ctx)
+    else:
+        with ayanamsa_table(start_utc, end_utc), \
+                longitude_grid(start_utc, end_utc, step_seconds):
+            per_rule_rows = [RULE_FUNCTION_MAP[key](ctx) for key in rule_keys]
+    
+    # Rules that loop over signs/windows emit a few ordered runs, so each
+    # list is sorted in near-linear time, then k-way merged by start time
+    # (still UTC; ties keep rule order) and localized in one batch
+    by_start = operator.attrgetter("start")
+    for rule_rows in per_rule_rows:
+        rule_rows.sort(key=by_start)
+    rows = list(heapq.merge(*per_rule_rows, key=by_start))
+    localize_rows(rows, tz)
     
     return rows
 
+# ============================================================================
+# CSV EXPORT
+# ============================================================================
+
+CSV_HEADER = ['Category', 'Rule', 'Body', 'Start', 'End', 'Sign', 'House', 'Window', 'Description']
+CSV_ROW_KEYS = ['category', 'rule', 'body', 'start_str', 'end_str', 'sign', 'house', 'window', 'description']
+
+def stream_csv(records, header=None, chunk_rows=256):
+    """Yield CSV text in chunks of chunk_rows records, reusing one StringIO buffer"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(header)
+    for i, record in enumerate(records, 1):
+        writer.writerow(record)
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue()
+
 # ============================================================================
 # NATAL CHART COMPUTATION
 # ============================================================================
 
 def compute_natal_chart(birth_dt_utc, birth_lat, birth_lon):
-    """Compute natal chart with all required information"""
-    
+    """Compute natal chart with all required information (inside use_ayanamsa()).
+    Memoized per sidereal mode, so /compute and /download_csv for the same
+    birth data share one computation; callers get their own copy."""
+    assert swe_lock.locked(), "compute_natal_chart must run inside use_ayanamsa()"
+    chart = _natal_chart_cached(birth_dt_utc.timestamp(), round(birth_lat, 6),
+                                round(birth_lon, 6), _current_sid_mode)
+    return copy.deepcopy(chart)
+
+@lru_cache(maxsize=1024)
+def _natal_chart_cached(birth_ts, birth_lat, birth_lon, sid_mode):
+    # sid_mode is only part of the key; the mode itself is already set
+    return _compute_natal_chart(datetime.fromtimestamp(birth_ts, timezone.utc),
+                                birth_lat, birth_lon)
+
+def natal_position(lon):
+    """Natal chart entry (sign, degree, nakshatra, D9 sign) for a sidereal longitude"""
+    sign_idx, deg = sign_and_deg(lon)
+    nak_idx, nak_name, nak_lord = get_nakshatra_from_longitude(lon)
+    d9_sign_idx = calculate_navamsa_sign(lon)
+    return {
+        "longitude": lon,
+        "sign_index": sign_idx,
+        "sign": SIGNS[sign_idx],
+        "degree": deg,
+        "nakshatra": nak_name,
+        "nakshatra_lord": nak_lord,
+        "d9_sign_index": d9_sign_idx,
+        "d9_sign": SIGNS[d9_sign_idx],
+    }
+
+def _compute_natal_chart(birth_dt_utc, birth_lat, birth_lon):
     # Calculate ascendant
     asc_lon = calculate_ascendant(birth_dt_utc, birth_lat, birth_lon)
     asc_sign_idx, asc_deg = sign_and_deg(asc_lon)
@@ -1236,57 +1782,14 @@ def compute_natal_chart(birth_dt_utc, birth_lat, birth_lon):
         }
     }
     
-    # Calculate planetary positions
+    # Calculate planetary positions (one Julian Day for every body)
+    jd = julian_day(birth_dt_utc)
     for planet_name, planet_id in PLANET_MAP.items():
+        lon = _body_lon_sid_cached(planet_id, jd)
+        natal_chart[planet_name] = natal_position(lon)
         if planet_name == "Rahu":
-            lon = body_lon_sid(birth_dt_utc, planet_id)
-            sign_idx, deg = sign_and_deg(lon)
-            nak_idx, nak_name, nak_lord = get_nakshatra_from_longitude(lon)
-            d9_sign_idx = calculate_navamsa_sign(lon)
-            
-            natal_chart[planet_name] = {
-                "longitude": lon,
-                "sign_index": sign_idx,
-                "sign": SIGNS[sign_idx],
-                "degree": deg,
-                "nakshatra": nak_name,
-                "nakshatra_lord": nak_lord,
-                "d9_sign_index": d9_sign_idx,
-                "d9_sign": SIGNS[d9_sign_idx],
-            }
-            
             # Calculate Ketu (opposite of Rahu)
-            ketu_lon = wrap360(lon + 180.0)
-            ketu_sign_idx, ketu_deg = sign_and_deg(ketu_lon)
-            ketu_nak_idx, ketu_nak_name, ketu_nak_lord = get_nakshatra_from_longitude(ketu_lon)
-            ketu_d9_sign_idx = calculate_navamsa_sign(ketu_lon)
-            
-            natal_chart["Ketu"] = {
-                "longitude": ketu_lon,
-                "sign_index": ketu_sign_idx,
-                "sign": SIGNS[ketu_sign_idx],
-                "degree": ketu_deg,
-                "nakshatra": ketu_nak_name,
-                "nakshatra_lord": ketu_nak_lord,
-                "d9_sign_index": ketu_d9_sign_idx,
-                "d9_sign": SIGNS[ketu_d9_sign_idx],
-            }
-        else:
-            lon = body_lon_sid(birth_dt_utc, planet_id)
-            sign_idx, deg = sign_and_deg(lon)
-            nak_idx, nak_name, nak_lord = get_nakshatra_from_longitude(lon)
-            d9_sign_idx = calculate_navamsa_sign(lon)
-            
-            natal_chart[planet_name] = {
-                "longitude": lon,
-                "sign_index": sign_idx,
-                "sign": SIGNS[sign_idx],
-                "degree": deg,
-                "nakshatra": nak_name,
-                "nakshatra_lord": nak_lord,
-                "d9_sign_index": d9_sign_idx,
-                "d9_sign": SIGNS[d9_sign_idx],
-            }
+            natal_chart["Ketu"] = natal_position((lon + 180.0) % 360.0)
     
     # Calculate house lords
     natal_chart["SecondLord"] = HOUSE_LORDS[(asc_sign_idx + 1) % 12]
@@ -1305,6 +1808,7 @@ def compute_natal_chart(birth_dt_utc, birth_lat, birth_lon):
         (asc_sign_idx + 10) % 12, # 11th house
     ]
     natal_chart["PanapharaHouseSigns"] = panaphara_house_signs
+    natal_chart["PanapharaHouseSignsSorted"] = tuple(sorted(panaphara_house_signs))
     
     # Calculate Apoklima houses (3, 6, 9, 12)
     apoklima_house_signs = [
@@ -1314,6 +1818,7 @@ def compute_natal_chart(birth_dt_utc, birth_lat, birth_lon):
         (asc_sign_idx + 11) % 12, # 12th house
     ]
     natal_chart["ApoklimaHouseSigns"] = apoklima_house_signs
+    natal_chart["ApoklimaHouseSignsSorted"] = tuple(sorted(apoklima_house_signs))
     
     # Find Panaphara planets (planets in Panaphara houses + Panaphara degrees)
     panaphara_planets = []
@@ -1417,22 +1922,7 @@ def compute():
         selected_ayanamsa = request.form.get('ayanamsa')
 
         # Get enabled rules
-        enabled_rules = {
-            "enable_rule1": request.form.get('enable_rule1') == 'on',
-            "enable_rule2": request.form.get('enable_rule2') == 'on',
-            "enable_rule3": request.form.get('enable_rule3') == 'on',
-            "enable_rule4": request.form.get('enable_rule4') == 'on',
-            "enable_rule5": request.form.get('enable_rule5') == 'on',
-            "enable_rule6": request.form.get('enable_rule6') == 'on',
-            "enable_rule7": request.form.get('enable_rule7') == 'on',
-            "enable_rule8": request.form.get('enable_rule8') == 'on',
-            "enable_loss1": request.form.get('enable_loss1') == 'on',
-            "enable_loss2": request.form.get('enable_loss2') == 'on',
-            "enable_loss3": request.form.get('enable_loss3') == 'on',
-            "enable_loss4": request.form.get('enable_loss4') == 'on',
-            "enable_loss5": request.form.get('enable_loss5') == 'on',
-            "enable_loss6": request.form.get('enable_loss6') == 'on',
-        }
+        enabled_rules = enabled_rules_from_form(request.form)
         
         # Get location info (manual lat/lon fields override geocoding)
         birth_lat = request.form.get('birth_lat') or None
@@ -1532,22 +2022,7 @@ def download_csv():
         selected_ayanamsa = request.form.get('ayanamsa')
         
         # Get enabled rules
-        enabled_rules = {
-            "enable_rule1": request.form.get('enable_rule1') == 'on',
-            "enable_rule2": request.form.get('enable_rule2') == 'on',
-            "enable_rule3": request.form.get('enable_rule3') == 'on',
-            "enable_rule4": request.form.get('enable_rule4') == 'on',
-            "enable_rule5": request.form.get('enable_rule5') == 'on',
-            "enable_rule6": request.form.get('enable_rule6') == 'on',
-            "enable_rule7": request.form.get('enable_rule7') == 'on',
-            "enable_rule8": request.form.get('enable_rule8') == 'on',
-            "enable_loss1": request.form.get('enable_loss1') == 'on',
-            "enable_loss2": request.form.get('enable_loss2') == 'on',
-            "enable_loss3": request.form.get('enable_loss3') == 'on',
-            "enable_loss4": request.form.get('enable_loss4') == 'on',
-            "enable_loss5": request.form.get('enable_loss5') == 'on',
-            "enable_loss6": request.form.get('enable_loss6') == 'on',
-        }
+        enabled_rules = enabled_rules_from_form(request.form)
         
         # Get location info (manual lat/lon fields override geocoding)
         birth_lat = request.form.get('birth_lat') or None
@@ -1602,31 +2077,10 @@ def download_csv():
                 enabled_rules
             )
         
-        # Create CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Category', 'Rule', 'Body', 'Start', 'End', 'Sign', 'House', 'Window', 'Description'])
-        
-        # Write rows
-        for row in rows:
-            writer.writerow([
-                row['category'],
-                row['rule'],
-                row['body'],
-                row['start_str'],
-                row['end_str'],
-                row['sign'],
-                row['house'],
-                row['window'],
-                row['description'],
-            ])
-        
-        # Create response
-        output.seek(0)
+        # Rows are complete (sorted, swe_lock released); stream the serialization
+        records = map(operator.attrgetter(*CSV_ROW_KEYS), rows)
         return Response(
-            output.getvalue(),
+            stream_csv(records, header=CSV_HEADER),
             mimetype='text/csv',
             headers={'Content-Disposition': 'attachment; filename=transit_results.csv'}
         )
@@ -1635,4 +2089,5 @@ def download_csv():
         return render_template('error.html', error=str(e))
 
 if __name__ == "__main__":
+    threading.Thread(target=prewarm_geocode_cache, daemon=True).start()
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,48 @@
+# Gunicorn configuration for production deployment:
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# The transit scans are CPU-bound and pyswisseph holds the GIL, so scale with
+# sync worker processes (one per core) rather than threads.
+
+import fcntl
+import multiprocessing
+import os
+import threading
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5001")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "sync"
+
+# Long transit ranges can take minutes to scan
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "300"))
+
+# Import app once in the master: lookup tables, resolved ayanamsa constants and
+# the TimezoneFinder singleton are built once and shared copy-on-write.
+preload_app = True
+
+
+def post_fork(server, worker):
+    import app
+
+    # Forked workers must not share the master's swisseph file handles
+    app.init_swisseph()
+
+    # Every worker loads the popular cities already geocoded on disk
+    app.load_city_table()
+
+    # One worker at a time geocodes the missing ones. The flock is released
+    # when its holder exits, so a worker forked after it dies takes over.
+    lock = open(app.GEOCODE_CACHE_PATH + ".prewarm.lock", "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return
+
+    def prewarm():
+        try:
+            app.prewarm_geocode_cache()
+        finally:
+            lock.close()
+
+    threading.Thread(target=prewarm, daemon=True).start()
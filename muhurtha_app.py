@@ -12,10 +12,20 @@ from datetime import datetime, timedelta, timezone, date
 from zoneinfo import ZoneInfo
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
-from contextlib import contextmanager
-import threading
+from contextlib import closing, contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 import calendar
+import hashlib
 import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import numpy as np
 
 app = Flask(__name__)
 
@@ -85,8 +95,8 @@ KAARAKA_PRESETS = [
 
 ALL_PLANETS = ["Sun","Moon","Mars","Mercury","Jupiter","Venus","Saturn","Rahu"]
 
-# Thread safety for swisseph
-swe_lock = threading.RLock()
+# calc_ut flags for transit longitudes: positions only, speeds are never read
+CALC_FLAGS = swe.FLG_SWIEPH
 
 def set_kp_ayanamsa():
     for name in ["SIDM_KP_OLD","SIDM_KP","SIDM_KRISHNAMURTI"]:
@@ -95,6 +105,11 @@ def set_kp_ayanamsa():
             return
     swe.set_sid_mode(swe.SIDM_KRISHNAMURTI)
 
+# The sidereal mode never changes in this app: set it once, not per call.
+# With the mode fixed, ephemeris lookups are plain reads, and pyswisseph runs
+# each call under the GIL, so they need no lock of their own.
+set_kp_ayanamsa()
+
 # ── Astro helpers ─────────────────────────────────────────────────────────────
 
 def dt_to_jd(dt_utc):
@@ -111,25 +126,21 @@ def deg_in_sign(lon):
     return wrap360(lon) % 30.0
 
 def planet_lon(dt_utc, planet_id):
-    with swe_lock:
-        set_kp_ayanamsa()
-        jd = dt_to_jd(dt_utc)
-        result = swe.calc_ut(jd, planet_id)
-        trop = result[0][0]
-        ayan = swe.get_ayanamsa_ut(jd)
-        return wrap360(trop - ayan)
+    jd = dt_to_jd(dt_utc)
+    result = swe.calc_ut(jd, planet_id, CALC_FLAGS)
+    trop = result[0][0]
+    ayan = swe.get_ayanamsa_ut(jd)
+    return wrap360(trop - ayan)
 
 def ketu_lon(dt_utc):
     return wrap360(planet_lon(dt_utc, swe.MEAN_NODE) + 180.0)
 
 def ascendant_lon(dt_utc, lat, lon_deg):
-    with swe_lock:
-        set_kp_ayanamsa()
-        jd = dt_to_jd(dt_utc)
-        cusps, ascmc = swe.houses(jd, lat, lon_deg, b'P')
-        trop = ascmc[0]
-        ayan = swe.get_ayanamsa_ut(jd)
-        return wrap360(trop - ayan)
+    jd = dt_to_jd(dt_utc)
+    cusps, ascmc = swe.houses(jd, lat, lon_deg, b'P')
+    trop = ascmc[0]
+    ayan = swe.get_ayanamsa_ut(jd)
+    return wrap360(trop - ayan)
 
 def nakshatra_lord_of(lon):
     nak_idx = int(wrap360(lon) / (360.0/27.0))
@@ -157,16 +168,110 @@ def is_bad(house):
 # ── Transit chart snapshot ────────────────────────────────────────────────────
 
 def get_transit_chart(dt_utc, lat, lon_deg):
-    asc_lon = ascendant_lon(dt_utc, lat, lon_deg)
+    # One JD and one ayanamsa lookup shared by the ascendant and every body
+    jd = dt_to_jd(dt_utc)
+    ayan = swe.get_ayanamsa_ut(jd)
+    cusps, ascmc = swe.houses(jd, lat, lon_deg, b'P')
+    trop_lons = [(name, swe.calc_ut(jd, pid, CALC_FLAGS)[0][0])
+                 for name, pid in PLANET_IDS.items()]
+    asc_lon = wrap360(ascmc[0] - ayan)
     chart = {
         "asc_lon":  asc_lon,
         "asc_sign": sign_of(asc_lon),
         "asc_deg":  deg_in_sign(asc_lon),
     }
-    for name, pid in PLANET_IDS.items():
-        lon = planet_lon(dt_utc, pid)
+    for name, trop in trop_lons:
+        lon = wrap360(trop - ayan)
         chart[name] = {"lon": lon, "sign": sign_of(lon), "deg": deg_in_sign(lon)}
-    k_lon = ketu_lon(dt_utc)
+    k_lon = wrap360(chart["Rahu"]["lon"] + 180.0)
+    chart["Ketu"] = {"lon": k_lon, "sign": sign_of(k_lon), "deg": deg_in_sign(k_lon)}
+    return chart
+
+# Upper bound (with margin) on each body's sidereal speed in degrees per day
+MAX_SPEED = {
+    "Sun": 1.1, "Moon": 16.0, "Mars": 1.0, "Mercury": 2.5,
+    "Jupiter": 0.3, "Venus": 1.5, "Saturn": 0.2, "Rahu": 0.1,
+}
+
+# Samples between the instants at which every body is looked up exactly
+KNOT_SAMPLES = 180
+
+def _stays_in_sign(lon_a, lon_b, max_move):
+    """True if a body at lon_a and lon_b (sidereal, one knot interval apart)
+    cannot have left its sign in between: same sign at both knots, and each
+    knot is farther than max_move from that sign's cusps"""
+    if np.isnan(lon_a) or np.isnan(lon_b):
+        return False
+    sign = int(lon_a / 30.0)
+    if int(lon_b / 30.0) != sign:
+        return False
+    lo, hi = sign * 30.0, sign * 30.0 + 30.0
+    return min(lon_a - lo, hi - lon_a, lon_b - lo, hi - lon_b) > max_move
+
+def transit_table(dts_utc, lat, lon_deg):
+    """Sidereal longitudes for many instants (in time order) in one pass, one
+    body at a time. Returns (asc_lons, lons): lons[i, j] is PLANET_IDS body j
+    at dts_utc[i]. Rows whose ephemeris lookup failed are NaN.
+
+    The ascendant is exact at every instant. Bodies are looked up every
+    KNOT_SAMPLES instants; between two knots where MAX_SPEED proves the body
+    stayed in one sign, its longitude is interpolated (exact sign, approximate
+    degree), otherwise every instant is looked up."""
+    jds = [dt_to_jd(dt_utc) for dt_utc in dts_utc]
+    n = len(jds)
+    lons = np.full((n, len(PLANET_IDS)), np.nan)
+    asc_trop = np.full(n, np.nan)
+    ayans = np.full(n, np.nan)
+    knots = list(range(0, n, KNOT_SAMPLES))
+    if knots and knots[-1] != n - 1:
+        knots.append(n - 1)
+    jd_arr = np.array(jds)
+    for i, jd in enumerate(jds):
+        try:
+            ayans[i] = swe.get_ayanamsa_ut(jd)
+            asc_trop[i] = swe.houses(jd, lat, lon_deg, b'P')[1][0]
+        except Exception:
+            pass
+    calc_ut = swe.calc_ut
+
+    for j, (name, pid) in enumerate(PLANET_IDS.items()):
+        column = lons[:, j]
+
+        def look_up(i):
+            try:
+                column[i] = (calc_ut(jds[i], pid, CALC_FLAGS)[0][0] - ayans[i]) % 360.0
+            except Exception:
+                pass
+
+        for i in knots:
+            look_up(i)
+        for a, b in zip(knots, knots[1:]):
+            if b - a < 2:
+                continue
+            max_move = MAX_SPEED[name] * (jds[b] - jds[a]) / 2.0
+            if _stays_in_sign(column[a], column[b], max_move):
+                column[a + 1:b] = np.interp(jd_arr[a + 1:b], (jds[a], jds[b]),
+                                            (column[a], column[b]))
+            else:
+                for i in range(a + 1, b):
+                    look_up(i)
+    asc_lons = (asc_trop - ayans) % 360.0
+    return asc_lons, lons
+
+def chart_from_table(asc_lon, lons_row):
+    """get_transit_chart() dict for one row of transit_table(), or None if the
+    row is incomplete"""
+    if np.isnan(asc_lon) or np.isnan(lons_row).any():
+        return None
+    asc_lon = float(asc_lon)
+    chart = {
+        "asc_lon":  asc_lon,
+        "asc_sign": sign_of(asc_lon),
+        "asc_deg":  deg_in_sign(asc_lon),
+    }
+    for name, lon in zip(PLANET_IDS, lons_row.tolist()):
+        chart[name] = {"lon": lon, "sign": sign_of(lon), "deg": deg_in_sign(lon)}
+    k_lon = wrap360(chart["Rahu"]["lon"] + 180.0)
     chart["Ketu"] = {"lon": k_lon, "sign": sign_of(k_lon), "deg": deg_in_sign(k_lon)}
     return chart
 
@@ -259,7 +364,10 @@ def check_ketu_in_lagna(chart):
 
 
 def evaluate_moment(dt_utc, lat, lon_deg, kaaraka_planets):
-    chart = get_transit_chart(dt_utc, lat, lon_deg)
+    return evaluate_chart(get_transit_chart(dt_utc, lat, lon_deg), dt_utc, kaaraka_planets)
+
+
+def evaluate_chart(chart, dt_utc, kaaraka_planets):
     asc_sign = chart["asc_sign"]
     asc_deg  = chart["asc_deg"]
     lagna_lord = SIGN_LORDS[asc_sign]
@@ -331,7 +439,11 @@ def evaluate_moment_multi(dt_utc, lat, lon_deg, all_kaaraka_list):
         chart = get_transit_chart(dt_utc, lat, lon_deg)
     except Exception:
         return None
+    return evaluate_chart_multi(chart, dt_utc, all_kaaraka_list)
+
 
+def evaluate_chart_multi(chart, dt_utc, all_kaaraka_list):
+    """evaluate_moment_multi() for an already computed transit chart"""
     asc_sign = chart["asc_sign"]
     asc_deg  = chart["asc_deg"]
     lagna_lord = SIGN_LORDS[asc_sign]
@@ -393,6 +505,131 @@ def evaluate_moment_multi(dt_utc, lat, lon_deg, all_kaaraka_list):
     return results
 
 
+# ── Vectorized month scoring ──────────────────────────────────────────────────
+
+# Columns of the sign matrix: PLANET_IDS bodies, then Ketu
+BODY_NAMES = list(PLANET_IDS) + ["Ketu"]
+BODY_COL = {name: i for i, name in enumerate(BODY_NAMES)}
+
+# Body column of each sign's lord / nakshatra's lord
+SIGN_LORD_COL = np.array([BODY_COL[SIGN_LORDS[s]] for s in range(12)])
+NAK_LORD_COL = np.array([BODY_COL[lord] for lord in NAKSHATRA_LORDS])
+
+# GOOD_HOUSE[h]: house h passes rules 1-4 (Kendra or 11th, never 6/8/12)
+GOOD_HOUSE = np.array([h > 0 and is_kendra_or_11(h) and not is_bad(h) for h in range(13)])
+
+# Rule 5 quality by shorter arc (index 0 unused), and score by (rules passed, quality)
+R5_QUALITIES = ("excellent", "ok", "avoid")
+R5_QUALITY_BY_ARC = np.array([2] + [0 if a in (1, 4, 7, 10) else 1 if a in (2, 3, 11, 12) else 2
+                                    for a in range(1, 13)])
+SCORE_TABLE = np.array([[grade_moment(n, q)[1] for q in R5_QUALITIES] for n in range(6)])
+
+
+def grade_table(asc_lons, lons, all_kaaraka_list):
+    """Rules passed and score of every transit_table() row for every activity,
+    as evaluate_chart_multi() grades it: two (n, len(all_kaaraka_list)) int
+    arrays, -1 on rows chart_from_table() would reject. Bodies are integer
+    columns (BODY_COL); no per-moment chart dict is built."""
+    valid = ~(np.isnan(asc_lons) | np.isnan(lons).any(axis=1))
+    asc_lons = np.where(valid, asc_lons, 0.0)
+    lons = np.where(valid[:, None], lons, 0.0)
+    ketu = np.mod(lons[:, BODY_COL["Rahu"]] + 180.0, 360.0)
+    signs = (np.mod(np.column_stack((lons, ketu)), 360.0) / 30.0).astype(np.int64)
+    asc_sign = (np.mod(asc_lons, 360.0) / 30.0).astype(np.int64)
+    good = GOOD_HOUSE[(signs - asc_sign[:, None]) % 12 + 1]
+    rows = np.arange(len(asc_sign))
+
+    lagna_col = SIGN_LORD_COL[asc_sign]
+    base_pass = (good[rows, lagna_col].astype(np.int64)
+                 + good[rows, SIGN_LORD_COL[(asc_sign + 2) % 12]]
+                 + good[rows, SIGN_LORD_COL[(asc_sign + 10) % 12]])
+
+    # Rule 5: arc between lagna lord and the ascendant's nakshatra lord
+    nak_idx = (np.mod(asc_lons, 360.0) / (360.0/27.0)).astype(np.int64)
+    ll_sign = signs[rows, lagna_col]
+    nl_sign = signs[rows, NAK_LORD_COL[nak_idx]]
+    arc = np.minimum((nl_sign - ll_sign) % 12 + 1, (ll_sign - nl_sign) % 12 + 1)
+    r5_quality = R5_QUALITY_BY_ARC[arc]
+    ketu_in_lagna = signs[:, BODY_COL["Ketu"]] == asc_sign
+    base_pass += (r5_quality < 2) & ~ketu_in_lagna
+
+    rules_pass = np.empty((len(asc_sign), len(all_kaaraka_list)), dtype=np.int64)
+    for k, (_, kaaraka_planets) in enumerate(all_kaaraka_list):
+        r4_pass = np.ones(len(asc_sign), dtype=bool)
+        for pname in kaaraka_planets:
+            col = BODY_COL.get(pname)
+            r4_pass &= good[:, col] if col is not None else False
+        rules_pass[:, k] = base_pass + r4_pass
+    scores = SCORE_TABLE[rules_pass, r5_quality[:, None]]
+    rules_pass[ketu_in_lagna] = 0
+    scores[ketu_in_lagna] = 0
+    rules_pass[~valid] = -1
+    scores[~valid] = -1
+    return rules_pass, scores
+
+
+# ── Windows ───────────────────────────────────────────────────────────────────
+
+class Window:
+    """One passing window of a day or month scan. Slots instead of a dict per
+    window. Templates read w.start_str or w['start_str'] (Jinja falls back to
+    the attribute)."""
+    __slots__ = ("start", "start_utc", "best_score", "best_grade", "best_result", "scores",
+                 "day", "end", "end_utc", "start_str", "end_str", "date_str", "date_full",
+                 "duration_mins", "duration", "avg_score", "asc_sign", "asc_deg",
+                 "lagna_lord", "grade", "rules_pass", "r1", "r2", "r3", "r4", "r5")
+    # Datetimes and the raw result stay out of the export payload
+    _NOT_JSON = frozenset(("start", "end", "start_utc", "end_utc", "best_result", "scores"))
+
+    def __init__(self, start, start_utc, scores, best_result, day=None):
+        self.start = start
+        self.start_utc = start_utc
+        self.best_score = max(scores)
+        self.best_grade = best_result["grade"]
+        self.best_result = best_result
+        self.scores = scores
+        self.day = day
+
+    def close(self, end, end_utc):
+        """Set the end and the display fields shared by both scanners."""
+        self.end = end
+        self.end_utc = end_utc
+        fmt = "%I:%M %p"
+        self.start_str = self.start.strftime(fmt)
+        self.end_str   = end.strftime(fmt)
+        duration_mins  = int((end - self.start).total_seconds() / 60)
+        self.duration_mins = duration_mins
+        self.duration  = f"{duration_mins} min" if duration_mins < 60 else f"{duration_mins//60}h {duration_mins%60}m"
+        self.avg_score = round(sum(self.scores) / len(self.scores), 2)
+        r = self.best_result
+        self.asc_sign   = r["asc_sign"]
+        self.lagna_lord = r["lagna_lord"]
+        self.grade      = r["grade"]
+        self.rules_pass = r["rules_pass"]
+
+    def to_json_dict(self):
+        """The JSON-serializable fields that have been set, in slot order."""
+        return {k: getattr(self, k) for k in self.__slots__
+                if k not in self._NOT_JSON and hasattr(self, k)}
+
+
+def passing_runs(passes, group=None):
+    """(start, stop) index pairs of the runs of True in passes. With a group
+    array, a run also ends where the group value changes."""
+    passes = np.asarray(passes, dtype=bool)
+    first = np.ones(len(passes), dtype=bool)
+    last = np.ones(len(passes), dtype=bool)
+    first[1:] = ~passes[:-1]
+    last[:-1] = ~passes[1:]
+    if group is not None:
+        changed = group[1:] != group[:-1]
+        first[1:] |= changed
+        last[:-1] |= changed
+    starts = np.flatnonzero(passes & first)
+    stops = np.flatnonzero(passes & last) + 1
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
 # ── Day Scanner ───────────────────────────────────────────────────────────────
 
 def scan_day(date_str, lat, lon_deg, tz_name, kaaraka_planets, min_rules=3):
@@ -403,77 +640,69 @@ def scan_day(date_str, lat, lon_deg, tz_name, kaaraka_planets, min_rules=3):
 
     STEP = timedelta(minutes=2)
     windows = []
-    current_window = None
 
+    samples = []
     dt = day_start
     while dt < day_end:
-        dt_utc = dt.astimezone(timezone.utc)
-        try:
-            result = evaluate_moment(dt_utc, lat, lon_deg, kaaraka_planets)
-        except Exception as e:
-            dt += STEP
-            continue
-
-        passes = result["rules_pass"] >= min_rules
-
-        if passes:
-            if current_window is None:
-                current_window = {
-                    "start": dt,
-                    "start_utc": dt_utc,
-                    "best_score": result["score"],
-                    "best_grade": result["grade"],
-                    "best_result": result,
-                    "scores": [result["score"]],
-                }
-            else:
-                current_window["scores"].append(result["score"])
-                if result["score"] > current_window["best_score"]:
-                    current_window["best_score"] = result["score"]
-                    current_window["best_grade"] = result["grade"]
-                    current_window["best_result"] = result
-        else:
-            if current_window is not None:
-                current_window["end"] = dt
-                current_window["end_utc"] = dt_utc
-                _finalize_window(current_window, tz)
-                windows.append(current_window)
-                current_window = None
-
+        samples.append((dt, dt.astimezone(timezone.utc)))
         dt += STEP
-
-    if current_window is not None:
-        current_window["end"] = day_end
-        current_window["end_utc"] = day_end.astimezone(timezone.utc)
-        _finalize_window(current_window, tz)
-        windows.append(current_window)
+    asc_lons, lons = transit_table([dt_utc for _, dt_utc in samples], lat, lon_deg)
+    rules_pass, scores = grade_table(asc_lons, lons, [("", kaaraka_planets)])
+
+    def result_at(row, dt_utc):
+        # Full result dict, only for each window's best moment
+        return evaluate_chart(chart_from_table(asc_lons[row], lons[row]), dt_utc,
+                              kaaraka_planets)
+
+    # Invalid rows neither extend nor close a window
+    valid_rows = np.flatnonzero(rules_pass[:, 0] >= 0)
+    row_scores = scores[valid_rows, 0].tolist()
+    for a, b in passing_runs(rules_pass[valid_rows, 0] >= min_rules):
+        run = row_scores[a:b]
+        best = valid_rows[a + run.index(max(run))]
+        w = Window(*samples[valid_rows[a]], run, result_at(best, samples[best][1]))
+        if b < len(valid_rows):
+            _close_day_window(w, *samples[valid_rows[b]])
+        else:
+            _close_day_window(w, day_end, day_end.astimezone(timezone.utc))
+        windows.append(w)
 
     return windows
 
 
-def _finalize_window(w, tz):
-    fmt = "%I:%M %p"
-    w["start_str"] = w["start"].strftime(fmt)
-    w["end_str"]   = w["end"].strftime(fmt)
-    duration_mins  = int((w["end"] - w["start"]).total_seconds() / 60)
-    w["duration"]  = f"{duration_mins} min" if duration_mins < 60 else f"{duration_mins//60}h {duration_mins%60}m"
-    avg = sum(w["scores"]) / len(w["scores"])
-    w["avg_score"] = round(avg, 2)
-    r = w["best_result"]
-    w["asc_sign"]      = r["asc_sign"]
-    w["asc_deg"]       = r["asc_deg"]
-    w["lagna_lord"]    = r["lagna_lord"]
-    w["grade"]         = r["grade"]
-    w["rules_pass"]    = r["rules_pass"]
-    w["r1"]            = r["r1"]
-    w["r2"]            = r["r2"]
-    w["r3"]            = r["r3"]
-    w["r4"]            = r["r4"]
-    w["r5"]            = r["r5"]
+def _close_day_window(w, end, end_utc):
+    w.close(end, end_utc)
+    r = w.best_result
+    w.asc_deg = r["asc_deg"]
+    w.r1, w.r2, w.r3, w.r4, w.r5 = r["r1"], r["r2"], r["r3"], r["r4"], r["r5"]
 
 
 # ── Monthly Scanner ───────────────────────────────────────────────────────────
 
+# With SCAN_WORKERS > 1, the days of a month scan are sampled in worker processes
+SCAN_WORKERS = int(os.environ.get("SCAN_WORKERS", "1"))
+_scan_pool = None
+
+def _get_scan_pool():
+    global _scan_pool
+    if _scan_pool is None:
+        _scan_pool = ProcessPoolExecutor(max_workers=SCAN_WORKERS,
+                                         mp_context=multiprocessing.get_context("spawn"))
+    return _scan_pool
+
+
+def month_transit_table(day_utcs, lat, lon_deg):
+    """transit_table() over each day's UTC sample list, concatenated in order.
+    Days are independent, so they are spread over the scan pool when enabled;
+    windows are still stitched across midnight by the caller."""
+    if SCAN_WORKERS > 1 and len(day_utcs) > 1:
+        tables = list(_get_scan_pool().map(transit_table, day_utcs,
+                                           repeat(lat), repeat(lon_deg)))
+        return (np.concatenate([asc for asc, _ in tables]),
+                np.concatenate([lons for _, lons in tables]))
+    return transit_table([dt_utc for utcs in day_utcs for dt_utc in utcs], lat, lon_deg)
+
+
 def scan_month(year, month, lat, lon_deg, tz_name, custom_planets=None, top_n=5):
     """
     Scan ALL days in a month for ALL activity presets simultaneously.
@@ -495,108 +724,175 @@ def scan_month(year, month, lat, lon_deg, tz_name, custom_planets=None, top_n=5)
         else:
             all_kaaraka.append((preset["label"], preset["planets"]))
 
-    # Per-activity: track open windows and closed windows
     activity_windows = {label: [] for label, _ in all_kaaraka}
-    activity_current = {label: None for label, _ in all_kaaraka}
 
+    # Sample instants of every day, then one ephemeris pass for the whole month
+    day_samples = []
     for day in range(1, num_days + 1):
         day_start = datetime(year, month, day, 0, 0, 0, tzinfo=tz)
         day_end = day_start + timedelta(hours=24)
+        samples = []
         dt = day_start
-
         while dt < day_end:
-            dt_utc = dt.astimezone(timezone.utc)
-            multi_results = evaluate_moment_multi(dt_utc, lat, lon_deg, all_kaaraka)
-
-            if multi_results is None:
-                dt += STEP
-                continue
-
-            for label, result in multi_results.items():
-                passes = result["score"] >= MIN_SCORE
-                current = activity_current[label]
-
-                if passes:
-                    if current is None:
-                        activity_current[label] = {
-                            "start": dt,
-                            "start_utc": dt_utc,
-                            "best_score": result["score"],
-                            "best_grade": result["grade"],
-                            "best_result": result,
-                            "scores": [result["score"]],
-                            "day": day,
-                        }
-                    else:
-                        current["scores"].append(result["score"])
-                        if result["score"] > current["best_score"]:
-                            current["best_score"] = result["score"]
-                            current["best_grade"] = result["grade"]
-                            current["best_result"] = result
-                else:
-                    if current is not None:
-                        current["end"] = dt
-                        current["end_utc"] = dt_utc
-                        _finalize_month_window(current, tz, year, month)
-                        activity_windows[label].append(current)
-                        activity_current[label] = None
-
+            samples.append((dt, dt.astimezone(timezone.utc)))
             dt += STEP
-
-        # Close any open windows at end of day
-        for label, current in activity_current.items():
-            if current is not None and current.get("day") == day:
-                current["end"] = day_end
-                current["end_utc"] = day_end.astimezone(timezone.utc)
-                _finalize_month_window(current, tz, year, month)
-                activity_windows[label].append(current)
-                activity_current[label] = None
+        day_samples.append(samples)
+    asc_lons, lons = month_transit_table(
+        [[dt_utc for _, dt_utc in samples] for samples in day_samples], lat, lon_deg)
+    _, scores = grade_table(asc_lons, lons, all_kaaraka)
+
+    def result_at(row, dt_utc, k):
+        # Full result dict, only for each window's best moment
+        label, planets = all_kaaraka[k]
+        chart = chart_from_table(asc_lons[row], lons[row])
+        return evaluate_chart_multi(chart, dt_utc, [(label, planets)])[label]
+
+    # Runs of qualifying samples per activity; invalid rows neither extend nor
+    # close a window, and every window closes at the end of its day
+    samples = [sample for day_list in day_samples for sample in day_list]
+    valid_rows = np.flatnonzero((scores >= 0).all(axis=1))
+    row_day = np.repeat(np.arange(1, num_days + 1),
+                        [len(day_list) for day_list in day_samples])[valid_rows]
+    day_ends = [datetime(year, month, day, 0, 0, 0, tzinfo=tz) + timedelta(hours=24)
+                for day in range(1, num_days + 1)]
+
+    for k, (label, _) in enumerate(all_kaaraka):
+        row_scores = scores[valid_rows, k]
+        runs = passing_runs(row_scores >= MIN_SCORE, row_day)
+        row_scores = row_scores.tolist()
+        for a, b in runs:
+            run = row_scores[a:b]
+            best = valid_rows[a + run.index(max(run))]
+            day = int(row_day[a])
+            w = Window(*samples[valid_rows[a]], run, result_at(best, samples[best][1], k), day)
+            if b < len(valid_rows) and row_day[b] == day:
+                _close_month_window(w, *samples[valid_rows[b]])
+            else:
+                day_end = day_ends[day - 1]
+                _close_month_window(w, day_end, day_end.astimezone(timezone.utc))
+            activity_windows[label].append(w)
 
     # Sort and pick top N per activity
     result_by_activity = {}
     for label, windows in activity_windows.items():
-        sorted_windows = sorted(windows, key=lambda w: (-w["best_score"], -w.get("duration_mins", 0)))
+        sorted_windows = sorted(windows, key=lambda w: (-w.best_score, -w.duration_mins))
         result_by_activity[label] = sorted_windows[:top_n]
 
     return result_by_activity
 
 
-def _finalize_month_window(w, tz, year, month):
-    fmt_time = "%I:%M %p"
-    fmt_date = "%a, %d %b"
-    w["start_str"]  = w["start"].strftime(fmt_time)
-    w["end_str"]    = w["end"].strftime(fmt_time)
-    w["date_str"]   = w["start"].strftime(fmt_date)
-    w["date_full"]  = w["start"].strftime("%Y-%m-%d")
-    duration_mins   = int((w["end"] - w["start"]).total_seconds() / 60)
-    w["duration_mins"] = duration_mins
-    w["duration"]   = f"{duration_mins} min" if duration_mins < 60 else f"{duration_mins//60}h {duration_mins%60}m"
-    avg = sum(w["scores"]) / len(w["scores"])
-    w["avg_score"]  = round(avg, 2)
-    r = w["best_result"]
-    w["asc_sign"]   = r["asc_sign"]
-    w["lagna_lord"] = r["lagna_lord"]
-    w["grade"]      = r["grade"]
-    w["rules_pass"] = r["rules_pass"]
+def _close_month_window(w, end, end_utc):
+    w.close(end, end_utc)
+    w.date_str  = w.start.strftime("%a, %d %b")
+    w.date_full = w.start.strftime("%Y-%m-%d")
 
 
 # ── Geocoding ─────────────────────────────────────────────────────────────────
 
 tf = TimezoneFinder()
+# timezonefinder seeks shared file handles, so serialize it
+_tf_lock = threading.Lock()
+_geolocator = Nominatim(user_agent="muhurtha_app", timeout=10)
+
+# Persistent geocode cache: normalized place name -> get_location() dict.
+# SQLite locks the file, so worker processes can share it.
+GEOCODE_CACHE_PATH = os.environ.get(
+    "MUHURTHA_GEOCODE_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "muhurtha_geocache.sqlite3"))
+
+@lru_cache(maxsize=4096)
+def _timezone_at_rounded(lat, lon_deg):
+    with _tf_lock:
+        return tf.timezone_at(lat=lat, lng=lon_deg)
+
+def timezone_at(lat, lon_deg):
+    """Timezone name at (lat, lon_deg); cached on coordinates rounded to 0.01°"""
+    return _timezone_at_rounded(round(lat, 2), round(lon_deg, 2))
+
+def _geocache_connect():
+    db = sqlite3.connect(GEOCODE_CACHE_PATH, timeout=10)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("CREATE TABLE IF NOT EXISTS geocode (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return db
+
+@lru_cache(maxsize=1024)
+def _geocode(key):
+    try:
+        with closing(_geocache_connect()) as db:
+            row = db.execute("SELECT value FROM geocode WHERE key = ?", (key,)).fetchone()
+        if row:
+            return json.loads(row[0])
+    except sqlite3.Error:
+        # An unreadable cache falls back to a live lookup
+        pass
+    loc = _geolocator.geocode(key)
+    if not loc:
+        raise LookupError(key)
+    location = {"lat": loc.latitude, "lon": loc.longitude,
+                "tz": timezone_at(loc.latitude, loc.longitude), "display": loc.address}
+    try:
+        with closing(_geocache_connect()) as db, db:
+            db.execute("INSERT OR REPLACE INTO geocode (key, value) VALUES (?, ?)",
+                       (key, json.dumps(location)))
+    except sqlite3.Error:
+        pass
+    return location
 
 def get_location(place_name):
+    # Failed lookups raise inside _geocode, so they are never cached
     try:
-        geolocator = Nominatim(user_agent="muhurtha_app", timeout=10)
-        loc = geolocator.geocode(place_name)
-        if loc:
-            tz_name = tf.timezone_at(lat=loc.latitude, lng=loc.longitude)
-            return {"lat": loc.latitude, "lon": loc.longitude,
-                    "tz": tz_name, "display": loc.address}
+        return dict(_geocode((place_name or "").strip().lower()))
     except Exception:
         pass
     return None
 
 
+# ── Monthly results cache ─────────────────────────────────────────────────────
+
+# Excel export payloads live on disk; the session only carries their key
+MONTHLY_CACHE_DIR = os.environ.get(
+    "MUHURTHA_RESULTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "muhurtha_results"))
+# Saved scans older than this are removed, so the cache stays bounded
+MONTHLY_CACHE_MAX_AGE = float(os.environ.get("MUHURTHA_RESULTS_MAX_AGE_DAYS", "7")) * 86400
+
+def monthly_cache_key(year, month, lat, lon_deg, tz_name, custom_planets):
+    params = json.dumps([year, month, lat, lon_deg, tz_name, custom_planets])
+    return hashlib.sha1(params.encode()).hexdigest()
+
+def _prune_monthly_results():
+    cutoff = time.time() - MONTHLY_CACHE_MAX_AGE
+    for entry in os.scandir(MONTHLY_CACHE_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            # Already removed by a concurrent save
+            pass
+
+def save_monthly_results(key, results):
+    os.makedirs(MONTHLY_CACHE_DIR, exist_ok=True)
+    _prune_monthly_results()
+    path = os.path.join(MONTHLY_CACHE_DIR, key + ".json")
+    # Each writer gets its own temp file (the dev server is threaded), and
+    # the rename is atomic, so a concurrent export never reads a partial file
+    f = tempfile.NamedTemporaryFile("w", dir=MONTHLY_CACHE_DIR, suffix=".tmp",
+                                    delete=False)
+    try:
+        with f:
+            json.dump(results, f)
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+def load_monthly_results(key):
+    try:
+        with open(os.path.join(MONTHLY_CACHE_DIR, key + ".json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
 # ── Routes ────────────────────────────────────────────────────────────────────
 
 @app.route("/")
@@ -623,7 +919,7 @@ def compute():
         try:
             lat = float(manual_lat)
             lon_deg = float(manual_lon)
-            tz_name = tf.timezone_at(lat=lat, lng=lon_deg) or "UTC"
+            tz_name = timezone_at(lat, lon_deg) or "UTC"
             location = {"lat": lat, "lon": lon_deg, "tz": tz_name, "display": place_name}
         except Exception as e:
             return render_template("muhurtha_error.html", error=str(e))
@@ -638,7 +934,7 @@ def compute():
             date_str, location["lat"], location["lon"],
             location["tz"], kaaraka_planets, min_rules
         )
-        windows.sort(key=lambda w: (-w["best_score"], w["start"]))
+        windows.sort(key=lambda w: (-w.best_score, w.start))
         return render_template("muhurtha_results.html",
                                windows=windows,
                                date=date_str,
@@ -676,7 +972,7 @@ def scan_month_route():
         try:
             lat = float(manual_lat)
             lon_deg = float(manual_lon)
-            tz_name = tf.timezone_at(lat=lat, lng=lon_deg) or "UTC"
+            tz_name = timezone_at(lat, lon_deg) or "UTC"
             location = {"lat": lat, "lon": lon_deg, "tz": tz_name, "display": place_name}
         except Exception as e:
             return render_template("muhurtha_error.html", error=str(e))
@@ -700,16 +996,15 @@ def scan_month_route():
         # Attach icon/label metadata
         presets_meta = {p["label"]: p for p in KAARAKA_PRESETS}
 
-        # Serialise results into session for Excel export
-        serialisable = {}
-        for label, slots in results.items():
-            serialisable[label] = []
-            for w in slots:
-                sw = {k: v for k, v in w.items()
-                      if k not in ("start", "end", "start_utc", "end_utc", "best_result", "scores")}
-                serialisable[label].append(sw)
+        # Serialise results to the disk cache for Excel export; a cookie
+        # session cannot hold a month of windows
+        serialisable = {label: [w.to_json_dict() for w in slots]
+                        for label, slots in results.items()}
+        key = monthly_cache_key(year, month, location["lat"], location["lon"],
+                                location["tz"], custom_planets)
+        save_monthly_results(key, serialisable)
 
-        session["last_monthly_results"] = json.dumps(serialisable)
+        session["last_monthly_key"] = key
         session["last_monthly_meta"] = json.dumps({
             "year": year, "month": month, "month_name": month_name,
             "place": location["display"], "tz": location["tz"],
@@ -733,17 +1028,17 @@ def scan_month_route():
 
 @app.route("/export_excel", methods=["GET"])
 def export_excel():
-    """Generate and serve the Excel export from the last monthly scan stored in session."""
+    """Generate and serve the Excel export from the last monthly scan in this session."""
     from muhurtha_excel import generate_excel
 
-    raw_results = session.get("last_monthly_results")
-    raw_meta    = session.get("last_monthly_meta")
+    key      = session.get("last_monthly_key")
+    raw_meta = session.get("last_monthly_meta")
+    results  = load_monthly_results(key) if key else None
 
-    if not raw_results or not raw_meta:
+    if results is None or not raw_meta:
         return render_template("muhurtha_error.html",
                                error="No scan results found. Please run a monthly scan first, then click Export.")
 
-    results = json.loads(raw_results)
     meta    = json.loads(raw_meta)
 
     stream = generate_excel(
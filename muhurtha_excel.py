@@ -5,55 +5,178 @@ Generates a formatted .xlsx workbook from monthly Muhurtha scan results.
 
 import io
 import calendar
+import weakref
+import zipfile
+from copy import copy
+from functools import lru_cache
 from openpyxl import Workbook
 from openpyxl.styles import (
     Font, PatternFill, Alignment, Border, Side, GradientFill
 )
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
 from openpyxl.styles.numbers import FORMAT_TEXT
+from openpyxl.writer.excel import ExcelWriter
 
 # ── Colour palette ────────────────────────────────────────────────────────────
-GOLD_DARK   = "B8860B"   # dark gold — headers
-GOLD_MID    = "C9A84C"   # mid gold — sub-headers
-GOLD_LIGHT  = "F5DFA0"   # light gold — title text
-INK         = "0E0C0A"   # near-black background
-INK_LIGHT   = "1C1A16"   # slightly lighter — row backgrounds
-PARCHMENT   = "F5EDD8"   # cream — body text
-SCORE5_BG   = "2A2400"   # dark gold tint — excellent row bg
-SCORE5_FG   = "FFD966"   # yellow-gold — excellent text
-SCORE4_BG   = "1A2200"   # dark green tint — very good row bg
-SCORE4_FG   = "A9C46C"   # green — very good text
-BORDER_CLR  = "3A3020"   # subtle border
-WHITE       = "FFFFFF"
-GRAY_LIGHT  = "E8E0CC"
+# ARGB with an opaque alpha byte: openpyxl would pad a 6-digit RGB to
+# 00RRGGBB, which some spreadsheet apps render as fully transparent.
+GOLD_DARK   = "FFB8860B"   # dark gold — headers
+GOLD_MID    = "FFC9A84C"   # mid gold — sub-headers
+GOLD_LIGHT  = "FFF5DFA0"   # light gold — title text
+INK         = "FF0E0C0A"   # near-black background
+INK_LIGHT   = "FF1C1A16"   # slightly lighter — row backgrounds
+INK_ALT     = "FF161410"   # alternate row background
+PARCHMENT   = "FFF5EDD8"   # cream — body text
+SCORE5_BG   = "FF2A2400"   # dark gold tint — excellent row bg
+SCORE5_FG   = "FFFFD966"   # yellow-gold — excellent text
+SCORE4_BG   = "FF1A2200"   # dark green tint — very good row bg
+SCORE4_FG   = "FFA9C46C"   # green — very good text
+BORDER_CLR  = "FF3A3020"   # subtle border
+WHITE       = "FFFFFFFF"
+GRAY_LIGHT  = "FFE8E0CC"
+
+# ── Sheet layout ──────────────────────────────────────────────────────────────
+ICONS = {
+    "Travel": "✈️", "Finance / Investment": "💰", "Job Application": "💼",
+    "Hard Work / Toil": "⚒️", "Construction": "🏗️", "Marriage": "💍",
+    "Health / Recovery": "🏥", "Legal Matters": "⚖️", "Education / Study": "📚",
+    "Custom": "⚙️",
+}
+
+# Karaka planets per preset; "Custom" shows the scan's own planets
+ACTIVITY_PLANETS = {
+    "Travel":               "Moon, Mercury",
+    "Finance / Investment": "Jupiter, Venus",
+    "Job Application":      "Sun, Mercury",
+    "Hard Work / Toil":     "Saturn",
+    "Construction":         "Saturn, Mars",
+    "Marriage":             "Venus",
+    "Health / Recovery":    "Sun, Moon",
+    "Legal Matters":        "Saturn, Mars",
+    "Education / Study":    "Mercury, Jupiter",
+}
+
+LEGEND_ITEMS = (
+    (SCORE5_BG, SCORE5_FG, "🌟 Excellent Muhurtha",  "All 5 rules pass · Rule 5 = Kendra (arc 1/4/7/10)"),
+    (SCORE4_BG, SCORE4_FG, "✨ Very Good Muhurtha",  "All 5 rules pass · Rule 5 = Just OK"),
+)
+# Alternating row backgrounds, indexed by row number & 1
+ROW_BGS = (INK_LIGHT, INK_ALT)
+
+SUMMARY_HEADERS = ("Activity", "Karaka Planets", "🌟 Excellent", "✨ Very Good", "Total Slots")
+
+ACTIVITY_COL_WIDTHS = (3, 14, 12, 12, 14, 22, 14, 18, 3)
+ACTIVITY_HEADERS    = ("#", "Date", "Start Time", "End Time", "Duration", "Grade", "Lagna", "Rules Passed")
+ACTIVITY_COL_ALIGNS = ("center", "left", "center", "center", "center", "left", "center", "center")
+
+MASTER_COL_WIDTHS = (3, 22, 14, 12, 12, 14, 22, 14, 3)
+MASTER_HEADERS    = ("Activity", "Date", "Start", "End", "Duration", "Grade", "Lagna", "Score")
+MASTER_COL_ALIGNS = ("left", "left", "center", "center", "center", "left", "center", "center")
+
+# (label, description, is_header); {planets} is the sheet's karaka planets
+RULE_INFO = (
+    ("MUHURTHA RULE REFERENCE", None, True),
+    ("Rule 1", "Lagna lord in kendra (1/4/7/10) or 11th house from transit lagna", False),
+    ("Rule 2", "3rd house lord in kendra or 11th house from transit lagna", False),
+    ("Rule 3", "11th house lord in kendra or 11th house from transit lagna", False),
+    ("Rule 4", "Karaka planet(s) [{planets}] in kendra or 11th from lagna", False),
+    ("Rule 5", "Lagna lord & Lagna nakshatra lord: Kendra arc = Excellent, 2/3/11/12 = OK, 5/6/8/9 = Avoid", False),
+    ("Override", "Ketu in Lagna → All grades nullified (Avoid)", False),
+)
+
+def activity_planets(label, custom_planets):
+    if label == "Custom":
+        return ", ".join(custom_planets) if custom_planets else ""
+    return ACTIVITY_PLANETS.get(label, "")
 
 # ── Style helpers ──────────────────────────────────────────────────────────────
+# Cached: every call with the same arguments returns one shared style object,
+# so a sheet's cells don't each allocate their own. Never mutate the results.
 
+@lru_cache(maxsize=None)
 def _font(bold=False, size=10, color=WHITE, italic=False, name="Arial"):
     return Font(name=name, bold=bold, size=size, color=color, italic=italic)
 
+@lru_cache(maxsize=None)
 def _fill(hex_color):
     return PatternFill("solid", fgColor=hex_color)
 
+@lru_cache(maxsize=None)
 def _border(color=BORDER_CLR):
     s = Side(style="thin", color=color)
     return Border(left=s, right=s, top=s, bottom=s)
 
+@lru_cache(maxsize=None)
 def _align(h="left", v="center", wrap=False):
     return Alignment(horizontal=h, vertical=v, wrap_text=wrap)
 
-def _set_cell(cell, value, font=None, fill=None, align=None, border=None, fmt=None):
-    cell.value = value
+def _grade_counts(slots):
+    """(excellent, very_good, total) for one activity's windows, in one pass."""
+    excellent = very_good = 0
+    for w in slots:
+        score = w["best_score"]
+        if score == 5:
+            excellent += 1
+        elif score == 4:
+            very_good += 1
+    return excellent, very_good, len(slots)
+
+def _merge_row(ws, row, min_col, max_col):
+    """Merge columns min_col..max_col of one row. Nothing is ever written
+    inside a merged range except its top-left cell, so this records the range
+    directly instead of ws.merge_cells(), which parses the range string and
+    builds and re-borders a MergedCell placeholder for every covered cell."""
+    ws.merged_cells.add(CellRange(min_col=min_col, min_row=row, max_col=max_col, max_row=row))
+
+def _paint_band(ws, min_row, max_row, min_col, max_col, fill):
+    """Fill a title band's blank cells. Call after the titles are merged and
+    set: merged cells and styled titles are skipped, not painted twice."""
+    merged = ws.merged_cells.ranges
+    for row in range(min_row, max_row + 1):
+        for col in range(min_col, max_col + 1):
+            if any(r.min_row <= row <= r.max_row and r.min_col <= col <= r.max_col
+                   for r in merged):
+                continue
+            cell = ws.cell(row=row, column=col)
+            if not cell.has_style:
+                cell.fill = fill
+
+# Per workbook: style-combination key -> (cell style array, the style objects).
+# openpyxl resolves every assigned style object to an index in the workbook's
+# style tables by hashing it field by field; cells given the same combination
+# end up with the same index array, so later ones just copy it.
+_STYLE_ARRAYS = weakref.WeakKeyDictionary()
+
+def _apply_style(cell, font, fill, align, border, fmt):
     if font:   cell.font      = font
     if fill:   cell.fill      = fill
     if align:  cell.alignment = align
     if border: cell.border    = border
     if fmt:    cell.number_format = fmt
 
+def _set_cell(cell, value, font=None, fill=None, align=None, border=None, fmt=None):
+    cell.value = value
+    if cell.has_style:
+        # Layer onto the cell's existing style the slow way
+        _apply_style(cell, font, fill, align, border, fmt)
+        return
+    styles = _STYLE_ARRAYS.setdefault(cell.parent.parent, {})
+    # The style helpers return shared objects, so identity is a sound key;
+    # keeping the objects in the entry stops their ids from being reused
+    key = (id(font), id(fill), id(align), id(border), fmt)
+    cached = styles.get(key)
+    if cached is None:
+        _apply_style(cell, font, fill, align, border, fmt)
+        styles[key] = (copy(cell._style), font, fill, align, border)
+    else:
+        cell._style = copy(cached[0])
+
 
 # ── Cover Sheet ───────────────────────────────────────────────────────────────
 
-def build_cover(wb, month_name, year, place, tz, custom_planets, results):
+def build_cover(wb, month_name, year, place, tz, custom_planets, counts):
+    """counts: (excellent, very_good, total) per shown activity, in sheet order."""
     ws = wb.active
     ws.title = "Cover"
     ws.sheet_view.showGridLines = False
@@ -75,26 +198,24 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
     ws.row_dimensions[8].height = 20
     ws.row_dimensions[9].height = 10
 
-    # Title background band
-    for row in range(2, 5):
-        for col in range(1, 7):
-            ws.cell(row=row, column=col).fill = _fill(INK)
-
     # Main title
-    ws.merge_cells("B2:E2")
+    _merge_row(ws, 2, 2, 5)  # B:E
     c = ws["B2"]
     _set_cell(c, f"Muhurtha Calendar — {month_name} {year}",
               font=_font(bold=True, size=20, color=GOLD_LIGHT, name="Arial"),
               fill=_fill(INK),
               align=_align("center", "center"))
 
-    ws.merge_cells("B3:E3")
+    _merge_row(ws, 3, 2, 5)  # B:E
     c = ws["B3"]
     _set_cell(c, "Auspicious Timing Report · KP Astrology · Transit Chart",
               font=_font(size=10, color=GOLD_MID, italic=True),
               fill=_fill(INK),
               align=_align("center", "center"))
 
+    # Title background band
+    _paint_band(ws, 2, 4, 1, 6, _fill(INK))
+
     # Meta info
     meta = [
         ("📍 Location",  place),
@@ -114,7 +235,7 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
         _set_cell(c_lbl, label,
                   font=_font(bold=True, size=10, color=GOLD_MID),
                   align=_align("left", "center"))
-        ws.merge_cells(f"C{row}:E{row}")
+        _merge_row(ws, row, 3, 5)  # C:E
         _set_cell(c_val, value,
                   font=_font(size=10, color=PARCHMENT),
                   align=_align("left", "center"))
@@ -123,17 +244,13 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
     # Legend
     row += 1
     ws.row_dimensions[row].height = 14
-    ws.merge_cells(f"B{row}:E{row}")
+    _merge_row(ws, row, 2, 5)  # B:E
     _set_cell(ws.cell(row=row, column=2), "LEGEND",
               font=_font(bold=True, size=9, color=GOLD_DARK),
               align=_align("left", "center"))
     row += 1
 
-    legend_items = [
-        (SCORE5_BG, SCORE5_FG, "🌟 Excellent Muhurtha",  "All 5 rules pass · Rule 5 = Kendra (arc 1/4/7/10)"),
-        (SCORE4_BG, SCORE4_FG, "✨ Very Good Muhurtha",  "All 5 rules pass · Rule 5 = Just OK"),
-    ]
-    for bg, fg, grade, desc in legend_items:
+    for bg, fg, grade, desc in LEGEND_ITEMS:
         ws.row_dimensions[row].height = 18
         c1 = ws.cell(row=row, column=2)
         c2 = ws.cell(row=row, column=3)
@@ -142,7 +259,7 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
                   fill=_fill(bg),
                   align=_align("left", "center"),
                   border=_border())
-        ws.merge_cells(f"C{row}:E{row}")
+        _merge_row(ws, row, 3, 5)  # C:E
         _set_cell(c2, desc,
                   font=_font(size=9, color=PARCHMENT),
                   fill=_fill(INK_LIGHT),
@@ -153,8 +270,7 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
     # Summary table header
     row += 2
     ws.row_dimensions[row].height = 22
-    headers = ["Activity", "Karaka Planets", "🌟 Excellent", "✨ Very Good", "Total Slots"]
-    for i, h in enumerate(headers, 2):
+    for i, h in enumerate(SUMMARY_HEADERS, 2):
         c = ws.cell(row=row, column=i)
         _set_cell(c, h,
                   font=_font(bold=True, size=10, color=GOLD_LIGHT),
@@ -164,36 +280,12 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
     row += 1
 
     # Summary rows — one per activity
-    ACTIVITY_PLANETS = {
-        "Travel":               "Moon, Mercury",
-        "Finance / Investment": "Jupiter, Venus",
-        "Job Application":      "Sun, Mercury",
-        "Hard Work / Toil":     "Saturn",
-        "Construction":         "Saturn, Mars",
-        "Marriage":             "Venus",
-        "Health / Recovery":    "Sun, Moon",
-        "Legal Matters":        "Saturn, Mars",
-        "Education / Study":    "Mercury, Jupiter",
-        "Custom":               ", ".join(custom_planets) if custom_planets else "—",
-    }
-
-    ICONS = {
-        "Travel": "✈️", "Finance / Investment": "💰", "Job Application": "💼",
-        "Hard Work / Toil": "⚒️", "Construction": "🏗️", "Marriage": "💍",
-        "Health / Recovery": "🏥", "Legal Matters": "⚖️", "Education / Study": "📚",
-        "Custom": "⚙️",
-    }
-
-    alt = False
-    for label, slots in results.items():
-        if label == "Custom" and not custom_planets:
-            continue
+    border = _border()
+    align_number, align_text = _align("center", "center"), _align("left", "center")
+    for n, (label, (excellent, very_good, total)) in enumerate(counts.items()):
         ws.row_dimensions[row].height = 18
-        bg = "161410" if alt else INK_LIGHT
-        excellent = sum(1 for w in slots if w["best_score"] == 5)
-        very_good = sum(1 for w in slots if w["best_score"] == 4)
-        total = len(slots)
-        planets = ACTIVITY_PLANETS.get(label, "")
+        fill = _fill(ROW_BGS[n & 1])
+        planets = activity_planets(label, custom_planets)
         icon = ICONS.get(label, "")
 
         row_data = [f"{icon} {label}", planets, excellent, very_good, total]
@@ -203,16 +295,15 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
             _set_cell(c, val,
                       font=_font(size=10, color=SCORE5_FG if (i == 4 and val > 0) else
                                               SCORE4_FG if (i == 5 and val > 0) else PARCHMENT),
-                      fill=_fill(bg),
-                      align=_align("center" if is_number else "left", "center"),
-                      border=_border())
-        alt = not alt
+                      fill=fill,
+                      align=align_number if is_number else align_text,
+                      border=border)
         row += 1
 
     # Sheet link hints
     row += 2
     ws.row_dimensions[row].height = 14
-    ws.merge_cells(f"B{row}:E{row}")
+    _merge_row(ws, row, 2, 5)  # B:E
     _set_cell(ws.cell(row=row, column=2),
               "Each activity has its own sheet with full slot details →",
               font=_font(size=9, color=GOLD_MID, italic=True),
@@ -221,14 +312,13 @@ def build_cover(wb, month_name, year, place, tz, custom_planets, results):
 
 # ── Activity Sheet ────────────────────────────────────────────────────────────
 
-def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
+def build_activity_sheet(wb, label, icon, planets, slots, counts, month_name, year, tz):
     safe_name = label.replace("/", "-").replace(":", "")[:31]
     ws = wb.create_sheet(title=f"{icon} {safe_name}"[:31])
     ws.sheet_view.showGridLines = False
 
     # Column widths
-    col_widths = [3, 14, 12, 12, 14, 22, 14, 18, 3]
-    for i, w in enumerate(col_widths, 1):
+    for i, w in enumerate(ACTIVITY_COL_WIDTHS, 1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
     # ── Sheet title ──
@@ -238,36 +328,31 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
     ws.row_dimensions[4].height = 18
     ws.row_dimensions[5].height = 10
 
-    for row in range(2, 5):
-        for col in range(1, 10):
-            ws.cell(row=row, column=col).fill = _fill(INK)
-
-    ws.merge_cells("B2:H2")
+    _merge_row(ws, 2, 2, 8)  # B:H
     _set_cell(ws["B2"], f"{icon}  {label}  —  {month_name} {year}",
               font=_font(bold=True, size=16, color=GOLD_LIGHT),
               fill=_fill(INK),
               align=_align("left", "center"))
 
-    ws.merge_cells("B3:H3")
+    _merge_row(ws, 3, 2, 8)  # B:H
     subtitle = f"Karaka Planets: {planets}   ·   Timezone: {tz}   ·   2-min scan intervals"
     _set_cell(ws["B3"], subtitle,
               font=_font(size=9, color=GOLD_MID, italic=True),
               fill=_fill(INK),
               align=_align("left", "center"))
 
-    ws.merge_cells("B4:H4")
+    _merge_row(ws, 4, 2, 8)  # B:H
     criteria = "Showing: 🌟 Excellent Muhurtha (score 5)  &  ✨ Very Good Muhurtha (score 4)  —  Top 5 per month"
     _set_cell(ws["B4"], criteria,
               font=_font(size=9, color=PARCHMENT),
               fill=_fill(INK),
               align=_align("left", "center"))
+    _paint_band(ws, 2, 4, 1, 9, _fill(INK))
 
     # ── Column headers ──
     row = 6
     ws.row_dimensions[row].height = 22
-    headers = ["#", "Date", "Start Time", "End Time", "Duration", "Grade", "Lagna", "Rules Passed"]
-    col_aligns = ["center","left","center","center","center","left","center","center"]
-    for i, (h, ha) in enumerate(zip(headers, col_aligns), 2):
+    for i, (h, ha) in enumerate(zip(ACTIVITY_HEADERS, ACTIVITY_COL_ALIGNS), 2):
         c = ws.cell(row=row, column=i)
         _set_cell(c, h,
                   font=_font(bold=True, size=10, color=GOLD_LIGHT),
@@ -279,7 +364,7 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
     # ── Data rows ──
     if not slots:
         ws.row_dimensions[row].height = 24
-        ws.merge_cells(f"B{row}:H{row}")
+        _merge_row(ws, row, 2, 8)  # B:H
         _set_cell(ws.cell(row=row, column=2),
                   "No Excellent or Very Good Muhurtha windows found this month.",
                   font=_font(size=10, color=PARCHMENT, italic=True),
@@ -288,11 +373,21 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
                   border=_border())
         return
 
+    # Styles that only vary by column, or by score: (fill, per-column fonts)
+    aligns = [_align(ha, "center") for ha in ACTIVITY_COL_ALIGNS]
+    border = _border()
+    # Rank and Grade columns (2, 7) use the score's accent color
+    score_styles = {
+        score: (_fill(bg), [_font(size=10, color=fg if i in (2, 7) else PARCHMENT, bold=(i == 2))
+                            for i in range(2, 2 + len(aligns))])
+        for score, bg, fg in ((5, SCORE5_BG, SCORE5_FG), (4, SCORE4_BG, SCORE4_FG))
+    }
+
+    # Data rows take the sheet's default height; only the other rows set one
+    ws.sheet_format.defaultRowHeight = 22
+    ws.sheet_format.customHeight = True
     for rank, w in enumerate(slots, 1):
-        ws.row_dimensions[row].height = 22
-        score = w["best_score"]
-        bg = SCORE5_BG if score == 5 else SCORE4_BG
-        fg = SCORE5_FG if score == 5 else SCORE4_FG
+        fill, fonts = score_styles[5 if w["best_score"] == 5 else 4]
 
         row_vals = [
             rank,
@@ -304,27 +399,18 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
             w["asc_sign"],
             f"{w['rules_pass']} / 5",
         ]
-        col_aligns = ["center","left","center","center","center","left","center","center"]
-        for i, (val, ha) in enumerate(zip(row_vals, col_aligns), 2):
-            c = ws.cell(row=row, column=i)
-            text_color = fg if i in (2, 7) else PARCHMENT
-            if i == 7:  # Grade column — use accent color
-                text_color = fg
-            _set_cell(c, val,
-                      font=_font(size=10, color=text_color,
-                                 bold=(i == 2)),
-                      fill=_fill(bg),
-                      align=_align(ha, "center"),
-                      border=_border())
+        for i, (val, font, align) in enumerate(zip(row_vals, fonts, aligns), 2):
+            _set_cell(ws.cell(row=row, column=i), val,
+                      font=font, fill=fill, align=align, border=border)
         row += 1
 
     # ── Summary footer ──
+    ws.row_dimensions[row].height = 15  # spacer rows keep Excel's standard height
     row += 1
     ws.row_dimensions[row].height = 18
-    excellent_count = sum(1 for w in slots if w["best_score"] == 5)
-    very_good_count = sum(1 for w in slots if w["best_score"] == 4)
+    excellent_count, very_good_count, _ = counts
 
-    ws.merge_cells(f"B{row}:D{row}")
+    _merge_row(ws, row, 2, 4)  # B:D
     _set_cell(ws.cell(row=row, column=2),
               f"🌟 Excellent: {excellent_count}   ·   ✨ Very Good: {very_good_count}   ·   Total: {len(slots)}",
               font=_font(bold=True, size=10, color=GOLD_MID),
@@ -332,20 +418,12 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
               align=_align("left", "center"))
 
     # ── Rule reference box ──
+    ws.row_dimensions[row + 1].height = 15
     row += 2
-    rule_info = [
-        ("MUHURTHA RULE REFERENCE", None, True),
-        ("Rule 1", "Lagna lord in kendra (1/4/7/10) or 11th house from transit lagna", False),
-        ("Rule 2", "3rd house lord in kendra or 11th house from transit lagna", False),
-        ("Rule 3", "11th house lord in kendra or 11th house from transit lagna", False),
-        ("Rule 4", f"Karaka planet(s) [{planets}] in kendra or 11th from lagna", False),
-        ("Rule 5", "Lagna lord & Lagna nakshatra lord: Kendra arc = Excellent, 2/3/11/12 = OK, 5/6/8/9 = Avoid", False),
-        ("Override", "Ketu in Lagna → All grades nullified (Avoid)", False),
-    ]
-    for label_r, desc, is_header in rule_info:
+    for label_r, desc, is_header in RULE_INFO:
         ws.row_dimensions[row].height = 16
         if is_header:
-            ws.merge_cells(f"B{row}:H{row}")
+            _merge_row(ws, row, 2, 8)  # B:H
             _set_cell(ws.cell(row=row, column=2), label_r,
                       font=_font(bold=True, size=9, color=GOLD_DARK),
                       fill=_fill(INK),
@@ -356,8 +434,8 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
                       font=_font(bold=True, size=9, color=GOLD_MID),
                       fill=_fill(INK),
                       align=_align("left", "center"))
-            ws.merge_cells(f"C{row}:H{row}")
-            _set_cell(ws.cell(row=row, column=3), desc,
+            _merge_row(ws, row, 3, 8)  # C:H
+            _set_cell(ws.cell(row=row, column=3), desc.format(planets=planets),
                       font=_font(size=9, color=PARCHMENT),
                       fill=_fill(INK),
                       align=_align("left", "center"))
@@ -366,32 +444,29 @@ def build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz):
 
 # ── Master Sheet (all activities combined) ────────────────────────────────────
 
-def build_master_sheet(wb, results, month_name, year, tz, custom_planets):
+def build_master_sheet(wb, all_windows, month_name, year, tz):
+    """all_windows: ("<icon> <label>", window) pairs, already in display order."""
     ws = wb.create_sheet(title="📋 All Windows", index=1)
     ws.sheet_view.showGridLines = False
 
-    col_widths = [3, 22, 14, 12, 12, 14, 22, 14, 3]
-    for i, w in enumerate(col_widths, 1):
+    for i, w in enumerate(MASTER_COL_WIDTHS, 1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
     ws.row_dimensions[1].height = 8
     ws.row_dimensions[2].height = 32
     ws.row_dimensions[3].height = 14
 
-    for col in range(1, 10):
-        ws.cell(row=2, column=col).fill = _fill(INK)
-
-    ws.merge_cells("B2:H2")
+    _merge_row(ws, 2, 2, 8)  # B:H
     _set_cell(ws["B2"], f"All Muhurtha Windows — {month_name} {year}",
               font=_font(bold=True, size=15, color=GOLD_LIGHT),
               fill=_fill(INK),
               align=_align("left", "center"))
+    _paint_band(ws, 2, 2, 1, 9, _fill(INK))
 
     # Header
     row = 4
     ws.row_dimensions[row].height = 22
-    headers = ["Activity", "Date", "Start", "End", "Duration", "Grade", "Lagna", "Score"]
-    for i, h in enumerate(headers, 2):
+    for i, h in enumerate(MASTER_HEADERS, 2):
         _set_cell(ws.cell(row=row, column=i), h,
                   font=_font(bold=True, size=10, color=GOLD_LIGHT),
                   fill=_fill(GOLD_DARK),
@@ -399,33 +474,27 @@ def build_master_sheet(wb, results, month_name, year, tz, custom_planets):
                   border=_border())
     row += 1
 
-    ICONS = {
-        "Travel": "✈️", "Finance / Investment": "💰", "Job Application": "💼",
-        "Hard Work / Toil": "⚒️", "Construction": "🏗️", "Marriage": "💍",
-        "Health / Recovery": "🏥", "Legal Matters": "⚖️", "Education / Study": "📚",
-        "Custom": "⚙️",
+    aligns = [_align(ha, "center") for ha in MASTER_COL_ALIGNS]
+    border = _border()
+    # Activity and Lagna columns (2, 8) use the score's accent color
+    fonts_by_fg = {
+        fg: [_font(size=10, color=fg if i in (2, 8) else PARCHMENT, bold=(i == 2))
+             for i in range(2, 2 + len(aligns))]
+        for fg in (SCORE5_FG, SCORE4_FG, PARCHMENT)
     }
 
-    # Collect all windows, sort by date then score
-    all_windows = []
-    for label, slots in results.items():
-        if label == "Custom" and not custom_planets:
-            continue
-        icon = ICONS.get(label, "")
-        for w in slots:
-            all_windows.append((label, icon, w))
-
-    all_windows.sort(key=lambda x: (x[2]["date_full"], -x[2]["best_score"]))
-
-    alt = False
-    for label, icon, w in all_windows:
-        ws.row_dimensions[row].height = 20
+    # Data rows take the sheet's default height; an empty month keeps Excel's
+    if all_windows:
+        ws.sheet_format.defaultRowHeight = 20
+        ws.sheet_format.customHeight = True
+    for n, (activity, w) in enumerate(all_windows):
         score = w["best_score"]
-        bg = SCORE5_BG if score == 5 else (SCORE4_BG if score == 4 else ("161410" if alt else INK_LIGHT))
+        bg = SCORE5_BG if score == 5 else (SCORE4_BG if score == 4 else ROW_BGS[n & 1])
         fg = SCORE5_FG if score == 5 else (SCORE4_FG if score == 4 else PARCHMENT)
+        fill, fonts = _fill(bg), fonts_by_fg[fg]
 
         row_vals = [
-            f"{icon} {label}",
+            activity,
             w["date_str"],
             w["start_str"],
             w["end_str"],
@@ -434,19 +503,13 @@ def build_master_sheet(wb, results, month_name, year, tz, custom_planets):
             w["asc_sign"],
             "🌟" if score == 5 else "✨",
         ]
-        col_aligns = ["left","left","center","center","center","left","center","center"]
-        for i, (val, ha) in enumerate(zip(row_vals, col_aligns), 2):
+        for i, (val, font, align) in enumerate(zip(row_vals, fonts, aligns), 2):
             _set_cell(ws.cell(row=row, column=i), val,
-                      font=_font(size=10, color=fg if i in (2, 8) else PARCHMENT,
-                                 bold=(i == 2)),
-                      fill=_fill(bg),
-                      align=_align(ha, "center"),
-                      border=_border())
-        alt = not alt
+                      font=font, fill=fill, align=align, border=border)
         row += 1
 
     if not all_windows:
-        ws.merge_cells(f"B{row}:H{row}")
+        _merge_row(ws, row, 2, 8)  # B:H
         _set_cell(ws.cell(row=row, column=2),
                   "No Excellent or Very Good windows found this month.",
                   font=_font(size=10, color=PARCHMENT, italic=True),
@@ -456,47 +519,45 @@ def build_master_sheet(wb, results, month_name, year, tz, custom_planets):
 
 # ── Main export function ──────────────────────────────────────────────────────
 
-def generate_excel(results, month_name, year, place, tz, custom_planets):
+def generate_excel(results, month_name, year, place, tz, custom_planets, compresslevel=1):
     """
     Returns a BytesIO stream containing the formatted .xlsx workbook.
+    compresslevel: zlib level for the zip container (1 = fastest, 9 = smallest).
     """
-    ACTIVITY_PLANETS = {
-        "Travel":               "Moon, Mercury",
-        "Finance / Investment": "Jupiter, Venus",
-        "Job Application":      "Sun, Mercury",
-        "Hard Work / Toil":     "Saturn",
-        "Construction":         "Saturn, Mars",
-        "Marriage":             "Venus",
-        "Health / Recovery":    "Sun, Moon",
-        "Legal Matters":        "Saturn, Mars",
-        "Education / Study":    "Mercury, Jupiter",
-        "Custom":               ", ".join(custom_planets) if custom_planets else "",
-    }
-    ICONS = {
-        "Travel": "✈️", "Finance / Investment": "💰", "Job Application": "💼",
-        "Hard Work / Toil": "⚒️", "Construction": "🏗️", "Marriage": "💍",
-        "Health / Recovery": "🏥", "Legal Matters": "⚖️", "Education / Study": "📚",
-        "Custom": "⚙️",
-    }
+    # The Custom activity only gets sheets when custom planets were chosen
+    results = {label: slots for label, slots in results.items()
+               if label != "Custom" or custom_planets}
+
+    # One pass over the results for every sheet: per-activity grade counts,
+    # and all windows sorted by date then score for the master sheet
+    counts = {}
+    all_windows = []
+    for label, slots in results.items():
+        counts[label] = _grade_counts(slots)
+        activity = f"{ICONS.get(label, '')} {label}"
+        all_windows.extend((activity, w) for w in slots)
+    all_windows.sort(key=lambda x: (x[1]["date_full"], -x[1]["best_score"]))
 
     wb = Workbook()
 
     # Cover sheet (uses wb.active)
-    build_cover(wb, month_name, year, place, tz, custom_planets, results)
+    build_cover(wb, month_name, year, place, tz, custom_planets, counts)
 
     # Master "all windows" sheet
-    build_master_sheet(wb, results, month_name, year, tz, custom_planets)
+    build_master_sheet(wb, all_windows, month_name, year, tz)
 
     # One sheet per activity
     for label, slots in results.items():
-        if label == "Custom" and not custom_planets:
-            continue
         icon = ICONS.get(label, "⚙️")
-        planets = ACTIVITY_PLANETS.get(label, "")
-        build_activity_sheet(wb, label, icon, planets, slots, month_name, year, tz)
+        planets = activity_planets(label, custom_planets)
+        build_activity_sheet(wb, label, icon, planets, slots, counts[label],
+                             month_name, year, tz)
 
-    # Save to BytesIO
+    # Save to BytesIO. Same as wb.save(), but with a caller-chosen
+    # deflate level instead of zlib's default 6
     stream = io.BytesIO()
-    wb.save(stream)
+    archive = zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED,
+                              allowZip64=True, compresslevel=compresslevel)
+    ExcelWriter(wb, archive).save()
     stream.seek(0)
     return stream